@@ -8,12 +8,41 @@ from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import sys
+import ctypes
+import functools
 import numpy as np
-from typing import Tuple, List, Callable
+from typing import Tuple, List, Callable, Optional
 from .optics_engine import OpticsEngine, Ray
+from .optics_kernels import (accumulate_ball_intensity, count_ball_ray_hits, count_surface_hits,
+                             warm_up as warm_up_kernels)
 import math
 
 
+# 描画済みテキストのキャッシュ（(フォント, 文字列, 色) → サーフェス）
+_text_cache = {}
+_TEXT_CACHE_SIZE = 512
+
+
+def render_text(font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+    """
+    テキストを描画したサーフェスを取得（同じ文字列は前回の結果を使い回す）
+
+    見出しやボタン名のように毎フレーム同じ文字列は、初回以降ラスタライズを省ける。
+    数値を含む文字列で増えすぎないよう、古いものから捨てて最大512件に抑える。
+    画面が作成済みなら表示形式に変換しておき、ブリットも速くする。
+    """
+    key = (font, text, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        if len(_text_cache) >= _TEXT_CACHE_SIZE:
+            del _text_cache[next(iter(_text_cache))]
+        surface = font.render(text, True, color)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        _text_cache[key] = surface
+    return surface
+
+
 class TabGroup:
     """タブUIコンポーネント"""
     def __init__(self, x: int, y: int, width: int, tabs: List[str]):
@@ -24,27 +53,41 @@ class TabGroup:
         self.active_tab = 0
         self.tab_height = 28
         self.tab_width = width // len(tabs)
+        # 描画済みタブのキャッシュ（(アクティブタブ, フォント) が同じ間は使い回す）
+        self._cached_surf = None
+        self._cache_key = None
 
     def draw(self, surface: pygame.Surface, font: pygame.font.Font):
+        # 見た目はアクティブタブだけで決まるので、変わった時だけ描き直す
+        key = (self.active_tab, font)
+        if key != self._cache_key:
+            self._cached_surf = self._render(font)
+            self._cache_key = key
+        surface.blit(self._cached_surf, (self.x, self.y))
+
+    def _render(self, font: pygame.font.Font) -> pygame.Surface:
+        """タブ全体を (0, 0) 基準のサーフェスに描画"""
+        tabs_surf = pygame.Surface((self.tab_width * len(self.tabs), self.tab_height), pygame.SRCALPHA)
         for i, tab_name in enumerate(self.tabs):
-            tab_x = self.x + i * self.tab_width
-            tab_rect = pygame.Rect(tab_x, self.y, self.tab_width, self.tab_height)
+            tab_x = i * self.tab_width
+            tab_rect = pygame.Rect(tab_x, 0, self.tab_width, self.tab_height)
 
             # アクティブタブは明るく、非アクティブは暗く
             if i == self.active_tab:
-                pygame.draw.rect(surface, (240, 240, 245), tab_rect)
-                pygame.draw.rect(surface, (70, 130, 220), tab_rect, 2)
+                pygame.draw.rect(tabs_surf, (240, 240, 245), tab_rect)
+                pygame.draw.rect(tabs_surf, (70, 130, 220), tab_rect, 2)
                 text_color = (50, 50, 50)
             else:
-                pygame.draw.rect(surface, (200, 200, 210), tab_rect)
-                pygame.draw.rect(surface, (150, 150, 160), tab_rect, 1)
+                pygame.draw.rect(tabs_surf, (200, 200, 210), tab_rect)
+                pygame.draw.rect(tabs_surf, (150, 150, 160), tab_rect, 1)
                 text_color = (100, 100, 100)
 
             # タブ名
-            text_surf = font.render(tab_name, True, text_color)
+            text_surf = render_text(font, tab_name, text_color)
             text_x = tab_x + (self.tab_width - text_surf.get_width()) // 2
-            text_y = self.y + (self.tab_height - text_surf.get_height()) // 2
-            surface.blit(text_surf, (text_x, text_y))
+            text_y = (self.tab_height - text_surf.get_height()) // 2
+            tabs_surf.blit(text_surf, (text_x, text_y))
+        return tabs_surf
 
     def handle_event(self, event: pygame.event.Event) -> bool:
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -72,6 +115,13 @@ class Slider:
         self.dragging = False
         self.knob_radius = 8
         self.tab_index = tab_index  # どのタブに属するか
+        # 値の表示形式（範囲から決まるので最初に一度だけ判定、整数の範囲なら値も常に整数）
+        if isinstance(min_val, int) and isinstance(max_val, int):
+            self._format_value = str
+        elif (max_val <= 2.0 and min_val >= 1.0) or (max_val <= 30.0 and min_val < 1.0):
+            self._format_value = "{:.2f}".format
+        else:
+            self._format_value = "{:.1f}".format
         
         # テキスト入力用の状態
         self.input_active = False  # テキスト入力モードかどうか
@@ -81,29 +131,60 @@ class Slider:
         self.cursor_visible = True  # カーソル点滅用
         self.cursor_timer = 0  # カーソル点滅タイマー
         self.cursor_pos = 0  # カーソル位置（文字インデックス）
+        # 描画済みスライダーのキャッシュ（(値, ドラッグ中か, フォント) が同じ間は使い回す）
+        self._cached_surf = None
+        self._cache_key = None
+        # バーとつまみは形が変わらないので、一度描いたサーフェスを使い回す
+        self._bar_surf = None
+        self._knob_surf = None
 
     def draw(self, surface: pygame.Surface, font: pygame.font.Font):
+        # 入力ボックスのrectを保存（イベント処理用）
+        self.input_rect = pygame.Rect(self.rect.x + self.rect.width + 10, self.rect.y,
+                                      self.input_box_width, self.input_box_height)
+
+        if self.input_active:
+            # 入力中はテキストとカーソルが毎フレーム変わるので直接描画
+            self._draw_parts(surface, font, self.rect)
+            return
+
+        # 入力中でなければ見た目は値だけで決まるので、変わった時だけ描き直す
+        key = (self.value, self.dragging, font)
+        if key != self._cache_key:
+            self._cached_surf = self._render(font)
+            self._cache_key = key
+        surface.blit(self._cached_surf, (self.rect.x - self.knob_radius, self.rect.y - 20))
+
+    def _render(self, font: pygame.font.Font) -> pygame.Surface:
+        """ラベル・バー・値表示を、つまみの半径とラベルの高さ分ずらした位置基準のサーフェスに描画"""
+        width = max(self.knob_radius + self.rect.width + 10 + self.input_box_width,
+                    self.knob_radius + font.size(self.label)[0])
+        slider_surf = pygame.Surface((width, 20 + self.rect.height), pygame.SRCALPHA)
+        self._draw_parts(slider_surf, font, pygame.Rect(self.knob_radius, 20, self.rect.width, self.rect.height))
+        return slider_surf
+
+    def _draw_parts(self, surface: pygame.Surface, font: pygame.font.Font, rect: pygame.Rect):
+        """スライダーの各部品を rect の位置に描画"""
         # ラベル
-        label_surf = font.render(self.label, True, (50, 50, 50))
-        surface.blit(label_surf, (self.rect.x, self.rect.y - 20))
+        label_surf = render_text(font, self.label, (50, 50, 50))
+        surface.blit(label_surf, (rect.x, rect.y - 20))
 
         # スライダーバー
-        pygame.draw.rect(surface, (180, 180, 180), self.rect, border_radius=3)
+        surface.blit(self._get_bar_surface(), rect.topleft)
 
         # つまみの位置を計算
         ratio = (self.value - self.min_val) / (self.max_val - self.min_val)
-        knob_x = int(self.rect.x + ratio * self.rect.width)
-        knob_y = self.rect.y + self.rect.height // 2
+        knob_x = int(rect.x + ratio * rect.width)
+        knob_y = rect.y + rect.height // 2
 
         # つまみ
-        pygame.draw.circle(surface, (70, 130, 220), (knob_x, knob_y), self.knob_radius)
-        pygame.draw.circle(surface, (50, 100, 180), (knob_x, knob_y), self.knob_radius, 2)
+        surface.blit(self._get_knob_surface(), (knob_x - self.knob_radius - 1, knob_y - self.knob_radius - 1))
 
         # テキスト入力ボックスの位置を計算
-        input_x = self.rect.x + self.rect.width + 10
-        input_y = self.rect.y
+        input_x = rect.x + rect.width + 10
+        input_y = rect.y
         input_rect = pygame.Rect(input_x, input_y, self.input_box_width, self.input_box_height)
-        
+
         # テキスト入力ボックス
         if self.input_active:
             # アクティブ時は青枠
@@ -129,20 +210,25 @@ class Slider:
             # 非アクティブ時は値を表示
             pygame.draw.rect(surface, (245, 245, 250), input_rect)
             pygame.draw.rect(surface, (180, 180, 180), input_rect, 1)
-            # 値のフォーマット
-            if isinstance(self.value, int):
-                value_text = str(self.value)
-            elif self.max_val <= 2.0 and self.min_val >= 1.0:
-                value_text = f"{self.value:.2f}"
-            elif self.max_val <= 30.0 and self.min_val < 1.0:
-                value_text = f"{self.value:.2f}"
-            else:
-                value_text = f"{self.value:.1f}"
-            value_surf = font.render(value_text, True, (80, 80, 80))
+            value_surf = render_text(font, self._format_value(self.value), (80, 80, 80))
             surface.blit(value_surf, (input_rect.x + 4, input_rect.y + 2))
-        
-        # 入力ボックスのrectを保存（イベント処理用）
-        self.input_rect = input_rect
+
+    def _get_bar_surface(self) -> pygame.Surface:
+        """スライダーバー（角丸の矩形）を描画したサーフェスを取得（初回のみ作成）"""
+        if self._bar_surf is None:
+            self._bar_surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(self._bar_surf, (180, 180, 180), self._bar_surf.get_rect(), border_radius=3)
+        return self._bar_surf
+
+    def _get_knob_surface(self) -> pygame.Surface:
+        """つまみ（塗りと枠の円）を描画したサーフェスを取得（初回のみ作成、中心は (半径+1, 半径+1)）"""
+        if self._knob_surf is None:
+            size = self.knob_radius * 2 + 2
+            center = (self.knob_radius + 1, self.knob_radius + 1)
+            self._knob_surf = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(self._knob_surf, (70, 130, 220), center, self.knob_radius)
+            pygame.draw.circle(self._knob_surf, (50, 100, 180), center, self.knob_radius, 2)
+        return self._knob_surf
 
     def handle_event(self, event: pygame.event.Event) -> bool:
         # テキスト入力モードの処理
@@ -240,6 +326,10 @@ class Slider:
         # スライダーのドラッグ処理
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             mouse_pos = event.pos
+            # つまみの可動範囲（バーをつまみの半径分広げた矩形）の外なら距離計算をせずに終了
+            # （rectはサイドバー描画時に移動するので、その都度求める）
+            if not self.rect.inflate(self.knob_radius * 2, self.knob_radius * 2).collidepoint(mouse_pos):
+                return False
             knob_pos = self._get_knob_pos()
             if ((mouse_pos[0] - knob_pos[0]) ** 2 + (mouse_pos[1] - knob_pos[1]) ** 2) <= self.knob_radius ** 2:
                 self.dragging = True
@@ -314,12 +404,22 @@ class OpticsSimulator:
                 self.title_font = pygame.font.Font(None, 28)
                 self.small_font = pygame.font.Font(None, 18)
 
+        # サイドバーの操作説明を描画済みのサーフェス
+        self._help_surface = None
+
         # UIパネルとビューのレイアウト
         self.ui_panel_width = 250
         self.view_margin = 10
         remaining_width = width - self.ui_panel_width - self.view_margin * 3
         self.view_width = remaining_width // 2
         self.view_height = height - 100
+        # 横図・上面図の画面上の領域（マウス判定用、境界線上も含めるため幅・高さ+1）
+        self._view_rects = {
+            'side': pygame.Rect(self.ui_panel_width + self.view_margin, 60,
+                                self.view_width + 1, self.view_height + 1),
+            'top': pygame.Rect(self.ui_panel_width + self.view_width + self.view_margin * 2, 60,
+                               self.view_width + 1, self.view_height + 1),
+        }
 
         # 光学エンジン
         self.engine = OpticsEngine(self.view_width, self.view_height)
@@ -331,13 +431,29 @@ class OpticsSimulator:
         self.running = True
         self.clock = pygame.time.Clock()
         self.light_position = (300, 450)
-        self.light_angle = np.radians(45)  # 光の角度（ラジアン、初期値45°）
-        self.light_spread = np.radians(5)  # 光の広がり角度（初期値5°）
+        self.light_angle = math.radians(45)  # 光の角度（ラジアン、初期値45°）
+        self.light_spread = math.radians(5)  # 光の広がり角度（初期値5°）
+        self._update_light_direction_cache()
         self.light_intensity = 1.0  # 光の強度（0.0〜2.0）
         self.dragging_light = False
 
-        # 球の光強度マップ（角度ごとの強度を記録）
-        self.ball_intensity_map = {}
+        # 球の光強度マップ（角度ごとの強度を記録、インデックス = 角度 + 180）
+        self.ball_intensity_map = np.zeros(360, dtype=float)
+        # JITカーネルは最初に3Dモードへ切り替えた時にコンパイルする（2Dだけなら起動を待たせない）
+        self._kernels_warmed_up = False
+
+        # 静的な背景（グリッド・空気・水・水面線）のキャッシュ
+        self._side_bg_cache_key = None  # 横図の背景の入力（水面の高さ, ズーム）
+        self._top_bg_cache_key = None  # 上面図の背景の入力（ズーム）
+        self._grid_surface = None
+        self._side_bg_surface = None
+        self._top_bg_surface = None
+        # 横図・上面図の作業用サーフェス（(ビュー, 幅, 高さ) ごとに使い回す）
+        self._view_surface_cache = {}
+        # 画面に合成済みのビュー領域（ビュー名 → (入力のキー, サーフェス)）
+        self._view_region_cache = {}
+        # 光源（塗りつぶし円＋輪郭）のスプライト（(半径, 輪郭の太さ) ごと）
+        self._light_sprite_cache = {}
 
         # ズーム設定
         self.side_view_zoom = 1.0
@@ -364,7 +480,7 @@ class OpticsSimulator:
         # 光の角度スライダー（小数第1位まで）
         self.sliders.append(Slider(
             slider_x, slider_y_start, slider_width,
-            -90.0, 90.0, round(np.degrees(self.light_angle), 1),
+            -90.0, 90.0, round(math.degrees(self.light_angle), 1),
             "光の角度 (°)",
             lambda v: self._set_light_angle(v),
             tab_index=0
@@ -373,7 +489,7 @@ class OpticsSimulator:
         # 光の広がりスライダー
         self.sliders.append(Slider(
             slider_x, slider_y_start + slider_spacing, slider_width,
-            0, 180, int(np.degrees(self.light_spread)),
+            0, 180, int(math.degrees(self.light_spread)),
             "光の広がり (°)",
             lambda v: self._set_light_spread(v),
             tab_index=0
@@ -495,6 +611,18 @@ class OpticsSimulator:
             'refractive_index': self.sliders[9],
             'water_ripple': self.sliders[10],
         }
+        # タブごとのスライダー（描画・イベント処理では現在のタブの分だけ見る）
+        self._sliders_by_tab = [[slider for slider in self.sliders if slider.tab_index == tab]
+                                for tab in range(len(self.tab_group.tabs))]
+
+        # シミュレーションの再計算待ちフラグ（1フレームに1回だけ再計算する）
+        self._simulation_dirty = True
+        # シミュレーションの更新回数（横図・上面図のキャッシュ判定に使う）
+        self._simulation_generation = 0
+        # 球の光強度・ヒートマップの再計算待ちフラグ（ヒートマップ表示時にだけ計算する）
+        self._heatmap_dirty = True
+        # 再描画待ちフラグ（イベントも再計算もアニメーションもなければ描画を省く）
+        self._needs_redraw = True
 
         # 初期状態で球を再構築
         self._rebuild_balls()
@@ -506,8 +634,26 @@ class OpticsSimulator:
         self.heatmap_mode = False  # ヒートマップ表示モード（キーH）
         self.show_light_source = True  # 光源表示モード（キーL）
         self.heatmap_cache = {}  # ヒートマップのキャッシュ
+        self._heatmap_normals = None  # ヒートマップの表面の各点の法線（全球で共通）
+        self._heatmap_sphere_strips = None  # ヒートマップ球の描画用頂点（全球で共通）
+        self._heatmap_vertex_cache = {}  # 球ごとのヒートマップ描画用の頂点・色配列
+        self._axis_lines = None  # 座標軸の線分の頂点配列
+        self._ball_hit_segments = None  # 3D表示の球の当たり判定用の線分の値（(元の線分配列, 値)）
         self.heatmap_max_intensity = 1  # ヒートマップの最大強度
         self.raytracing_image = None  # レイトレーシング結果のサーフェス
+        # 3D水面（ゆらぎなし）のグリッド線の頂点配列（水面の高さは描画時に移動）
+        grid_size = 500
+        grid_step = 50
+        self._water_grid_vertices = np.array(
+            [[(i * grid_step, 0, -grid_size), (i * grid_step, 0, grid_size),
+              (-grid_size, 0, i * grid_step), (grid_size, 0, i * grid_step)] for i in range(-10, 11)],
+            dtype=np.float32).reshape(-1, 3)
+        self._water_mesh_indices = None  # ゆらぎありの3D水面メッシュのインデックス（((格子数, 間隔), 配列)）
+        self._water_mesh_cache = None  # ゆらぎありの3D水面メッシュの頂点（(時刻・設定, 頂点配列)）
+        # 光源グローの光線（12本）の円周方向の三角関数表（角度は不変なので一度だけ計算）
+        glow_phi = np.linspace(0, 2 * np.pi, 12, endpoint=False)
+        self._glow_phi_sin = np.sin(glow_phi)
+        self._glow_phi_cos = np.cos(glow_phi)
         self.camera_rotation = [20.0, 45.0]  # [pitch, yaw] in degrees
         self.camera_distance = 800.0
         self.camera_target = [0.0, 0.0, 0.0]  # カメラの注視点（平行移動用）
@@ -531,6 +677,8 @@ class OpticsSimulator:
             {'label': 'Rot R', 'delta': 90.0},
             {'label': 'Rot L', 'delta': -90.0},
         ]
+        # 視点ボタンパネルの描画済みピクセル（(ホバー状態, ラベル, 位置), RGBAデータ, 幅, 高さ）
+        self._orientation_overlay_cache = None
 
         # 輝度プロファイル機能の状態
         self.profile_mode = False  # プロファイル表示モード
@@ -567,7 +715,40 @@ class OpticsSimulator:
         panel_x = self.width - panel_width - 15
         panel_y = 55
 
+        # ボタンの配置 (パネル内のrect, ラベル, アクティブか) を描画順に並べる
+        buttons = []
+        # 視点ボタン (Front, Back, Right, Left, Top, Bottom)
+        for i, btn in enumerate(self.orientation_buttons):
+            row = i // 2
+            col = i % 2
+            bx = padding + col * (btn_width + spacing_x)
+            by = padding + row * (btn_height + spacing_y)
+            buttons.append((pygame.Rect(bx, by, btn_width, btn_height), btn['label'], False))
+
+        # 回転ボタン (Rot R, Rot L)
+        rotation_start_row = 3
+        for i, btn in enumerate(self.rotation_buttons):
+            col = i % 2
+            bx = padding + col * (btn_width + spacing_x)
+            by = padding + rotation_start_row * (btn_height + spacing_y)
+            buttons.append((pygame.Rect(bx, by, btn_width, btn_height), btn['label'], False))
+
+        # Profile/Axisボタン (最下段)
+        profile_row = 4
+        by = padding + profile_row * (btn_height + spacing_y)
+        t1 = "Prof:ON" if self.profile_mode else "Prof:OFF"
+        buttons.append((pygame.Rect(padding, by, btn_width, btn_height), t1, self.profile_mode))
+        t2 = f"Axis: {self.profile_scan_axis}"
+        buttons.append((pygame.Rect(padding + btn_width + spacing_x, by, btn_width, btn_height), t2, False))
+
+        # 見た目はホバー中のボタンとラベルだけで決まるので、変わった時だけ描き直す
         mouse_pos = pygame.mouse.get_pos()
+        hovered = [rect.move(panel_x, panel_y).collidepoint(mouse_pos) for rect, _, _ in buttons]
+        cache_key = (tuple(hovered), t1, t2, panel_x)
+        if self._orientation_overlay_cache is not None and self._orientation_overlay_cache[0] == cache_key:
+            _, data, width, height = self._orientation_overlay_cache
+            self._draw_pixels_to_opengl(data, width, height, panel_x, panel_y)
+            return
 
         # オーバーレイ用のSurfaceを作成
         overlay_surf = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
@@ -580,7 +761,7 @@ class OpticsSimulator:
                          (0, 0, panel_width, panel_height),
                          width=1, border_radius=corner_radius)
 
-        def draw_modern_button(surf, rect, screen_rect, label, is_active=False, is_hovered=False):
+        def draw_modern_button(surf, rect, label, is_active=False, is_hovered=False):
             """モダンなボタンを描画"""
             # 色の設定
             if is_active:
@@ -598,66 +779,17 @@ class OpticsSimulator:
             pygame.draw.rect(surf, border_color, rect, width=1, border_radius=4)
 
             # テキスト
-            text = self.small_font.render(label, True, (240, 240, 245))
+            text = self._render_text(label, self.small_font, (240, 240, 245))
             text_rect = text.get_rect(center=rect.center)
             surf.blit(text, text_rect)
 
-        # 視点ボタン描画 (Front, Back, Right, Left, Top, Bottom)
-        for i, btn in enumerate(self.orientation_buttons):
-            row = i // 2
-            col = i % 2
-
-            bx = padding + col * (btn_width + spacing_x)
-            by = padding + row * (btn_height + spacing_y)
-
-            rect = pygame.Rect(bx, by, btn_width, btn_height)
-            screen_rect = pygame.Rect(panel_x + bx, panel_y + by, btn_width, btn_height)
-
-            is_hovered = screen_rect.collidepoint(mouse_pos)
-            draw_modern_button(overlay_surf, rect, screen_rect, btn['label'],
-                               is_active=False, is_hovered=is_hovered)
-
-        # 回転ボタン描画 (Rot R, Rot L)
-        rotation_start_row = 3
-        for i, btn in enumerate(self.rotation_buttons):
-            col = i % 2
-
-            bx = padding + col * (btn_width + spacing_x)
-            by = padding + rotation_start_row * (btn_height + spacing_y)
+        for (rect, label, is_active), is_hovered in zip(buttons, hovered):
+            draw_modern_button(overlay_surf, rect, label, is_active=is_active, is_hovered=is_hovered)
 
-            rect = pygame.Rect(bx, by, btn_width, btn_height)
-            screen_rect = pygame.Rect(panel_x + bx, panel_y + by, btn_width, btn_height)
-
-            is_hovered = screen_rect.collidepoint(mouse_pos)
-            draw_modern_button(overlay_surf, rect, screen_rect, btn['label'],
-                               is_active=False, is_hovered=is_hovered)
-
-        # Profile/Axisボタン描画 (最下段)
-        profile_row = 4
-
-        # Profile Button
-        bx1 = padding
-        by = padding + profile_row * (btn_height + spacing_y)
-        rect1 = pygame.Rect(bx1, by, btn_width, btn_height)
-        screen_rect1 = pygame.Rect(panel_x + bx1, panel_y + by, btn_width, btn_height)
-
-        is_hovered1 = screen_rect1.collidepoint(mouse_pos)
-        t1 = "Prof:ON" if self.profile_mode else "Prof:OFF"
-        draw_modern_button(overlay_surf, rect1, screen_rect1, t1,
-                           is_active=self.profile_mode, is_hovered=is_hovered1)
-
-        # Axis Button
-        bx2 = padding + btn_width + spacing_x
-        rect2 = pygame.Rect(bx2, by, btn_width, btn_height)
-        screen_rect2 = pygame.Rect(panel_x + bx2, panel_y + by, btn_width, btn_height)
-
-        is_hovered2 = screen_rect2.collidepoint(mouse_pos)
-        t2 = f"Axis: {self.profile_scan_axis}"
-        draw_modern_button(overlay_surf, rect2, screen_rect2, t2,
-                           is_active=False, is_hovered=is_hovered2)
-
-        # OpenGL上に描画
-        self._blit_pygame_surface_to_opengl(overlay_surf, panel_x, panel_y)
+        # ピクセルデータを保存してOpenGL上に描画
+        data = pygame.image.tostring(overlay_surf, 'RGBA', True)
+        self._orientation_overlay_cache = (cache_key, data, panel_width, panel_height)
+        self._draw_pixels_to_opengl(data, panel_width, panel_height, panel_x, panel_y)
 
     def init_opengl(self):
         """OpenGLの初期化"""
@@ -674,6 +806,58 @@ class OpticsSimulator:
 
         glClearColor(0.1, 0.1, 0.15, 1.0)
 
+        self._init_gl_resources()
+
+    def _init_gl_resources(self):
+        """OpenGLコンテキストごとのリソースを初期化（ウィンドウ再作成でコンテキストが変わるため毎回作り直す）"""
+        # 単位球のディスプレイリスト（(分割数, 分割数) → リストID）
+        self._unit_sphere_lists = {}
+        # 座標軸のディスプレイリスト（初回の描画時に作成）
+        self._axis_list = None
+        # 単位球をglScalefで拡大しても法線の長さが1になるように補正
+        glEnable(GL_RESCALE_NORMAL)
+
+        # 光線の頂点バッファ（xyz + rgb のインターリーブ、容量は頂点数）
+        self._ray_vbo = glGenBuffers(1)
+        self._ray_vbo_capacity = 0
+        self._ray_vbo_count = 0
+        self._ray_vbo_source = None  # 転送済みの線分配列（同じ配列なら再転送しない）
+
+        # 光源グロー用の放射状に減衰するテクスチャ（白、アルファ = exp(-3r²)、円の外は透明）
+        size = 64
+        coords = (np.arange(size) + 0.5) / size * 2 - 1
+        r2 = coords[None, :] ** 2 + coords[:, None] ** 2
+        glow = np.full((size, size, 4), 255, dtype=np.uint8)
+        glow[:, :, 3] = np.where(r2 < 1, np.exp(-3 * r2) * 255, 0).astype(np.uint8)
+        self._glow_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self._glow_texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, size, size, 0, GL_RGBA, GL_UNSIGNED_BYTE, glow)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def _get_unit_sphere_list(self, slices: int, stacks: int) -> int:
+        """半径1の球を描くディスプレイリストを取得（初回のみ作成）"""
+        display_list = self._unit_sphere_lists.get((slices, stacks))
+        if display_list is None:
+            display_list = glGenLists(1)
+            glNewList(display_list, GL_COMPILE)
+            quad = gluNewQuadric()
+            gluSphere(quad, 1.0, slices, stacks)
+            gluDeleteQuadric(quad)
+            glEndList()
+            self._unit_sphere_lists[(slices, stacks)] = display_list
+        return display_list
+
+    def _draw_unit_sphere(self, radius: float, slices: int, stacks: int):
+        """キャッシュした単位球を半径に合わせて拡大して描画（現在の位置・色で描く）"""
+        glPushMatrix()
+        glScalef(radius, radius, radius)
+        glCallList(self._get_unit_sphere_list(slices, stacks))
+        glPopMatrix()
+
     def init_opengl_natural(self):
         """自然光3DモードのOpenGL初期化"""
         glEnable(GL_DEPTH_TEST)
@@ -691,6 +875,15 @@ class OpticsSimulator:
         # 背景色（スカイブルーのグラデーション風）
         glClearColor(0.6, 0.75, 0.9, 1.0)
 
+        self._init_gl_resources()
+
+    def _warm_up_kernels_once(self):
+        """光線計算のJITカーネルを一度だけコンパイル（カーネルを使うのは3Dモードだけなので、切り替え時に済ませる）"""
+        if self._kernels_warmed_up:
+            return
+        self._kernels_warmed_up = True
+        warm_up_kernels()
+
     def setup_3d_perspective(self):
         """3D透視投影の設定"""
         glMatrixMode(GL_PROJECTION)
@@ -722,10 +915,8 @@ class OpticsSimulator:
             glRotatef(math.degrees(rotation_angle), 0, 0, 1)
         glColor3f(*color)
 
-        # GLUクアドリックで球体を描画
-        quad = gluNewQuadric()
-        gluSphere(quad, radius, 32, 32)
-        gluDeleteQuadric(quad)
+        # キャッシュした単位球を拡大して描画
+        self._draw_unit_sphere(radius, 32, 32)
 
         glPopMatrix()
 
@@ -736,13 +927,55 @@ class OpticsSimulator:
         glDisable(GL_LIGHTING)
 
         # キャッシュからヒットマップを取得
-        heatmap = self.heatmap_cache.get(ball_idx, {})
         max_intensity = self.heatmap_max_intensity
 
         # 球を描画（セグメント数を減らして軽量化）
         slices = 16
         stacks = 12
 
+        # 頂点と色の配列は、ヒット数配列・最大強度・半径が変わった時だけ作り直す
+        intensities = self.heatmap_cache.get(ball_idx)
+        cached = self._heatmap_vertex_cache.get(ball_idx)
+        if cached is None or cached[0] is not intensities or cached[1:3] != (max_intensity, radius):
+            if intensities is None:
+                colors = self.get_heatmap_color_vec(np.zeros((stacks + 1, slices)), max_intensity)
+            else:
+                colors = self.get_heatmap_color_vec(intensities, max_intensity)
+            # 単位球の頂点（stack ごとの帯を三角形に分割）と各頂点の色
+            unit_vertices, color_index, triangles = self._get_heatmap_sphere_strips()
+            vertices = (unit_vertices * radius).astype(np.float32).reshape(-1, 3)
+            vertex_colors = colors.reshape(-1, 3)[color_index].astype(np.float32).reshape(-1, 3)
+            cached = (intensities, max_intensity, radius, vertices, vertex_colors, triangles)
+            self._heatmap_vertex_cache[ball_idx] = cached
+        vertices, vertex_colors, triangles = cached[3:]
+
+        # 球全体を1回の描画命令で描く
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, vertices)
+        glColorPointer(3, GL_FLOAT, 0, vertex_colors)
+        glDrawElements(GL_TRIANGLES, len(triangles), GL_UNSIGNED_INT, triangles)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        glEnable(GL_LIGHTING)
+        glPopMatrix()
+
+    def _get_heatmap_sphere_strips(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        ヒートマップ球の頂点（stack ごとの帯）と三角形のインデックスを取得（初回のみ計算）
+
+        Returns:
+            (単位球の頂点 (stacks, (slices+1)*2, 3), 各頂点の色の heatmap 配列上の平坦インデックス,
+             GL_TRIANGLES 用の頂点インデックス (stacks*slices*6,))
+        """
+        if self._heatmap_sphere_strips is not None:
+            return self._heatmap_sphere_strips
+
+        slices = 16
+        stacks = 12
+        vertices = np.empty((stacks, (slices + 1) * 2, 3))
+        color_index = np.empty((stacks, (slices + 1) * 2), dtype=np.int32)
         for i in range(stacks):
             lat0 = math.pi * (-0.5 + float(i) / stacks)
             lat1 = math.pi * (-0.5 + float(i + 1) / stacks)
@@ -751,114 +984,125 @@ class OpticsSimulator:
             r0 = math.cos(lat0)
             r1 = math.cos(lat1)
 
-            glBegin(GL_QUAD_STRIP)
             for j in range(slices + 1):
                 lng = 2 * math.pi * float(j) / slices
                 x_n = math.cos(lng)
                 y_n = math.sin(lng)
 
-                for z_val, r_val, stack_idx in [(z0, r0, i), (z1, r1, i + 1)]:
-                    nx = x_n * r_val
-                    ny = y_n * r_val
-                    nz = z_val
-
-                    # キャッシュからこのセグメントの強度を取得
-                    seg_key = (stack_idx, j % slices)
-                    intensity = heatmap.get(seg_key, 0)
-                    color = self.get_heatmap_color(intensity, max_intensity)
+                for k, (z_val, r_val, stack_idx) in enumerate([(z0, r0, i), (z1, r1, i + 1)]):
+                    vertices[i, j * 2 + k] = (x_n * r_val, y_n * r_val, z_val)
+                    color_index[i, j * 2 + k] = stack_idx * slices + j % slices
 
-                    glColor3f(*color)
-                    glVertex3f(nx * radius, ny * radius, nz * radius)
+        # 帯の隣り合う2組の頂点 (a, b) と (c, d) が作る四角形を三角形2枚に分割
+        strip_length = (slices + 1) * 2
+        quad = np.arange(slices) * 2 + (np.arange(stacks) * strip_length)[:, None]
+        a, b, c, d = quad, quad + 1, quad + 2, quad + 3
+        triangles = np.stack([a, b, d, c, a, d], axis=-1).astype(np.uint32).ravel()
 
-            glEnd()
-
-        glEnable(GL_LIGHTING)
-        glPopMatrix()
+        self._heatmap_sphere_strips = (vertices, color_index, triangles)
+        return self._heatmap_sphere_strips
 
     def calculate_heatmap_cache(self):
-        """全球のヒートマップ情報を事前計算してキャッシュ"""
+        """全球のヒートマップ情報を事前計算してキャッシュ（球ごとに (stacks+1, slices) の int32 ヒット数配列）"""
         self.heatmap_cache = {}
         self.heatmap_max_intensity = 1
 
-        slices = 16
-        stacks = 12
-
-        all_intensities = []
+        if not self.engine.balls:
+            return
 
+        # 表面の各点の法線（2Dワールド座標系、全球で共通）
+        normals = self._get_heatmap_normals()
+        stacks_1, slices = normals.shape[:2]
+        normals = normals.reshape(-1, 3)
+
+        # 全光線の線分配列（update_simulation で構築済み）から長さ0の線分を除く
+        p1 = self.engine.rays_p1
+        d = self.engine.rays_p2 - p1
+        line_len_sq = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] + d[:, 2] * d[:, 2]
+        valid = line_len_sq >= 0.001
+        p1 = p1[valid]
+        d = d[valid]
+        line_len_sq = line_len_sq[valid]
+        ownership = self.engine.rays_ownership[valid]
+
+        max_intensity = 0
         for ball_idx, ball in enumerate(self.engine.balls):
-            ball_cx, ball_cy, ball_cz = ball['position']
             ball_r = ball['radius']
-            ball_heatmap = {}
-
-            for i in range(stacks + 1):
-                # 描画時と同じ計算方法を使用
-                lat = math.pi * (-0.5 + float(i) / stacks)
-                lat_sin = math.sin(lat)  # Z方向（OpenGLでのローカルZ）
-                lat_cos = math.cos(lat)  # X-Y平面での半径
-
-                for j in range(slices):
-                    lng = 2 * math.pi * float(j) / slices
-                    lng_cos = math.cos(lng)
-                    lng_sin = math.sin(lng)
-
-                    # OpenGLローカル座標系での法線（描画時と同じ）
-                    # nx = lng_cos * lat_cos
-                    # ny = lng_sin * lat_cos
-                    # nz = lat_sin
-                    nx = lng_cos * lat_cos
-                    ny = lng_sin * lat_cos
-                    nz = lat_sin
-
-                    # 球の表面のワールド座標（2D座標系）
-                    # 注意：2D座標系ではY軸が下向き、OpenGLではY軸が上向き
-                    # OpenGLの(nx, ny, nz)を2Dワールド座標に変換
-                    # OpenGL Y軸上向き → 2D Y軸下向き（反転）
-                    world_x = ball_cx + nx * ball_r
-                    world_y = ball_cy - ny * ball_r  # Y軸反転
-                    world_z = ball_cz + nz * ball_r
-
-                    # この点に当たる光線をカウント
-                    hit_count = 0
-                    tolerance = ball_r * 0.4
-
-                    for ray in self.engine.rays:
-                        if len(ray.path) < 2:
-                            continue
-
-                        for k in range(len(ray.path) - 1):
-                            p1 = ray.path[k]
-                            p2 = ray.path[k + 1]
-                            p1x, p1y = float(p1[0]), float(p1[1])
-                            p2x, p2y = float(p2[0]), float(p2[1])
-                            p1z = float(p1[2]) if len(p1) > 2 else 0.0
-                            p2z = float(p2[2]) if len(p2) > 2 else 0.0
-
-                            dx = p2x - p1x
-                            dy = p2y - p1y
-                            dz = p2z - p1z
-                            line_len_sq = dx * dx + dy * dy + dz * dz
-                            if line_len_sq < 0.001:
-                                continue
-
-                            t = max(0, min(1, ((world_x - p1x) * dx + (world_y - p1y) * dy + (world_z - p1z) * dz) / line_len_sq))
-                            closest_x = p1x + t * dx
-                            closest_y = p1y + t * dy
-                            closest_z = p1z + t * dz
-                            dist = math.sqrt((world_x - closest_x) ** 2 + (world_y - closest_y) ** 2 + (world_z - closest_z) ** 2)
-
-                            if dist <= tolerance:
-                                hit_count += 1
-                                break
-
-                    ball_heatmap[(i, j)] = hit_count
-                    if hit_count > 0:
-                        all_intensities.append(hit_count)
-
+            tolerance = ball_r * 0.4
+            center = np.asarray(ball['position'], dtype=float)
+
+            # 表面の点から許容距離内を通る線分は、球の中心から (半径 + 許容距離) 以内を通るので、
+            # 先にその線分だけに絞り込む（境界の丸め誤差で取りこぼさないよう少し余裕を持たせる）
+            w = center - p1
+            t = np.clip((w[:, 0] * d[:, 0] + w[:, 1] * d[:, 1] + w[:, 2] * d[:, 2]) / line_len_sq, 0, 1)
+            e = w - t[:, None] * d
+            reach = ball_r + tolerance + 1e-6
+            near = np.flatnonzero(e[:, 0] * e[:, 0] + e[:, 1] * e[:, 1] + e[:, 2] * e[:, 2] <= reach * reach)
+            near_ownership = ownership[near]
+            # 光線ごとの線分の開始位置（線分は光線ごとに連続して並んでいる）
+            ray_starts = np.flatnonzero(np.r_[True, near_ownership[1:] != near_ownership[:-1]])
+
+            # 球の表面のワールド座標 (M, 3) ごとに、近くを通る光線の数を数える
+            world = center + normals * ball_r
+            hit_count = count_surface_hits(world, p1[near], d[near], line_len_sq[near], ray_starts, tolerance)
+            ball_heatmap = hit_count.reshape(stacks_1, slices).astype(np.int32)
             self.heatmap_cache[ball_idx] = ball_heatmap
+            max_intensity = max(max_intensity, int(ball_heatmap.max()))
 
         # 最大強度を設定
-        if all_intensities:
-            self.heatmap_max_intensity = max(1, max(all_intensities))
+        self.heatmap_max_intensity = max(1, max_intensity)
+
+    def _get_heatmap_normals(self) -> np.ndarray:
+        """ヒートマップの表面の各点の法線 (stacks+1, slices, 3) を取得（初回のみ計算）"""
+        if self._heatmap_normals is not None:
+            return self._heatmap_normals
+
+        slices = 16
+        stacks = 12
+        # 描画時と同じ緯度・経度の三角関数表
+        lat = np.pi * (-0.5 + np.arange(stacks + 1) / stacks)
+        lng = 2 * np.pi * np.arange(slices) / slices
+        lat_sin = np.sin(lat)  # Z方向（OpenGLでのローカルZ）
+        lat_cos = np.cos(lat)  # X-Y平面での半径
+        # OpenGLローカル座標系での法線（描画時と同じ）を2Dワールド座標に変換
+        # 注意：2D座標系ではY軸が下向き、OpenGLではY軸が上向き（反転）
+        normals = np.stack([np.outer(lat_cos, np.cos(lng)),
+                            -np.outer(lat_cos, np.sin(lng)),
+                            np.broadcast_to(lat_sin[:, None], (stacks + 1, slices))], axis=-1)
+
+        self._heatmap_normals = normals
+        return normals
+
+    def _get_water_mesh_indices(self, n: int, grid_every: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ゆらぎありの水面メッシュの頂点インデックスを取得（初回のみ作成）
+
+        Args:
+            n: 1辺の格子点の数（頂点は vertices[ix * n + iz] の順）
+            grid_every: グリッド線を引く格子点の間隔
+
+        Returns:
+            (水面の GL_TRIANGLES 用インデックス, グリッド線の GL_LINES 用インデックス)
+        """
+        key = (n, grid_every)
+        if self._water_mesh_indices is not None and self._water_mesh_indices[0] == key:
+            return self._water_mesh_indices[1]
+
+        # X方向の帯ごとに、隣り合う格子点 a=(ix, iz), b=(ix+1, iz), c=(ix, iz+1), d=(ix+1, iz+1) の四角形を
+        # 三角形2枚に分割
+        a = (np.arange(n - 1)[:, None] * n + np.arange(n - 1)[None, :])
+        b, c, d = a + n, a + 1, a + n + 1
+        triangles = np.stack([a, b, d, c, a, d], axis=-1).astype(np.uint32).ravel()
+
+        # グリッド線（グリッドごとに X方向の線 → Z方向の線の順、それぞれ格子点を1つずつ結ぶ）
+        line = np.arange(0, n, grid_every)
+        seg = np.arange(n - 1)
+        x_lines = np.stack([line[:, None] * n + seg, line[:, None] * n + seg + 1], axis=-1)
+        z_lines = np.stack([seg * n + line[:, None], (seg + 1) * n + line[:, None]], axis=-1)
+        grid_lines = np.stack([x_lines, z_lines], axis=1).astype(np.uint32).ravel()
+
+        self._water_mesh_indices = (key, (triangles, grid_lines))
+        return triangles, grid_lines
 
     def draw_line_3d(self, p1, p2, color, width=2.0):
         """3D線分を描画"""
@@ -873,7 +1117,60 @@ class OpticsSimulator:
 
     def draw_axis_3d(self):
         """座標軸を画面左下に描画（デザイン性のあるXYZラベル付き）"""
-        glDisable(GL_LIGHTING)
+        # 形も位置も固定なので、初回に描画命令をディスプレイリストに記録して以降は呼び出すだけ
+        if self._axis_list is None:
+            # 記録中にリストを入れ子で作れないので、原点の球のリストは先に作っておく
+            self._get_unit_sphere_list(12, 12)
+            self._axis_list = glGenLists(1)
+            glNewList(self._axis_list, GL_COMPILE)
+            glDisable(GL_LIGHTING)
+
+            axis_origin = (-350, -200, -200)
+
+            # 原点の小さな球
+            glColor3f(0.8, 0.8, 0.8)
+            glPushMatrix()
+            glTranslatef(*axis_origin)
+            self._draw_unit_sphere(5, 12, 12)
+            glPopMatrix()
+
+            # 軸・矢印・ラベルの線を頂点配列からまとめて描画（線の太さが変わる所で区切る）
+            vertices, colors, batches = self._get_axis_lines()
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointer(3, GL_FLOAT, 0, vertices)
+            glColorPointer(3, GL_FLOAT, 0, colors)
+            for width, first, count in batches:
+                glLineWidth(width)
+                glDrawArrays(GL_LINES, first, count)
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+
+            glEnable(GL_LIGHTING)
+            glEndList()
+        glCallList(self._axis_list)
+
+    def _get_axis_lines(self) -> Tuple[np.ndarray, np.ndarray, List[Tuple[float, int, int]]]:
+        """
+        座標軸の線分の頂点配列を取得（形は固定なので初回のみ作成）
+
+        Returns:
+            (頂点 (2L, 3), 色 (2L, 3), 描画順の [(線の太さ, 先頭頂点, 頂点数)])
+        """
+        if self._axis_lines is not None:
+            return self._axis_lines
+
+        points = []
+        point_colors = []
+        batches = []
+
+        def add_line(p1, p2, color, width):
+            points.extend((p1, p2))
+            point_colors.extend((color, color))
+            if batches and batches[-1][0] == width:
+                batches[-1][2] += 2
+            else:
+                batches.append([width, len(points) - 2, 2])
 
         axis_origin = (-350, -200, -200)
         axis_length = 80
@@ -883,36 +1180,27 @@ class OpticsSimulator:
         y_color = (0.3, 1.0, 0.3)  # 緑
         z_color = (0.3, 0.6, 1.0)  # 青
 
-        # 原点の小さな球
-        glColor3f(0.8, 0.8, 0.8)
-        glPushMatrix()
-        glTranslatef(*axis_origin)
-        quad = gluNewQuadric()
-        gluSphere(quad, 5, 12, 12)
-        gluDeleteQuadric(quad)
-        glPopMatrix()
-
         # X軸（赤）- 矢印付き
         x_end = (axis_origin[0] + axis_length, axis_origin[1], axis_origin[2])
-        self.draw_line_3d(axis_origin, x_end, x_color, 3)
+        add_line(axis_origin, x_end, x_color, 3)
         # 矢印の先端
         arrow_size = 8
-        self.draw_line_3d(x_end, (x_end[0] - arrow_size, x_end[1] + arrow_size/2, x_end[2]), x_color, 2)
-        self.draw_line_3d(x_end, (x_end[0] - arrow_size, x_end[1] - arrow_size/2, x_end[2]), x_color, 2)
+        add_line(x_end, (x_end[0] - arrow_size, x_end[1] + arrow_size/2, x_end[2]), x_color, 2)
+        add_line(x_end, (x_end[0] - arrow_size, x_end[1] - arrow_size/2, x_end[2]), x_color, 2)
 
         # Y軸（緑）- 矢印付き
         y_end = (axis_origin[0], axis_origin[1] + axis_length, axis_origin[2])
-        self.draw_line_3d(axis_origin, y_end, y_color, 3)
+        add_line(axis_origin, y_end, y_color, 3)
         # 矢印の先端
-        self.draw_line_3d(y_end, (y_end[0] + arrow_size/2, y_end[1] - arrow_size, y_end[2]), y_color, 2)
-        self.draw_line_3d(y_end, (y_end[0] - arrow_size/2, y_end[1] - arrow_size, y_end[2]), y_color, 2)
+        add_line(y_end, (y_end[0] + arrow_size/2, y_end[1] - arrow_size, y_end[2]), y_color, 2)
+        add_line(y_end, (y_end[0] - arrow_size/2, y_end[1] - arrow_size, y_end[2]), y_color, 2)
 
         # Z軸（青）- 矢印付き
         z_end = (axis_origin[0], axis_origin[1], axis_origin[2] + axis_length)
-        self.draw_line_3d(axis_origin, z_end, z_color, 3)
+        add_line(axis_origin, z_end, z_color, 3)
         # 矢印の先端
-        self.draw_line_3d(z_end, (z_end[0], z_end[1] + arrow_size/2, z_end[2] - arrow_size), z_color, 2)
-        self.draw_line_3d(z_end, (z_end[0], z_end[1] - arrow_size/2, z_end[2] - arrow_size), z_color, 2)
+        add_line(z_end, (z_end[0], z_end[1] + arrow_size/2, z_end[2] - arrow_size), z_color, 2)
+        add_line(z_end, (z_end[0], z_end[1] - arrow_size/2, z_end[2] - arrow_size), z_color, 2)
 
         # XYZラベルを描画（正しい向きで）
         s = 10  # ラベルのサイズ
@@ -923,28 +1211,30 @@ class OpticsSimulator:
         ty = axis_origin[1]
         tz = axis_origin[2]
         # X の形を描画（斜めの2本線）
-        self.draw_line_3d((tx, ty, tz - s), (tx, ty, tz + s), x_color, 2)
-        self.draw_line_3d((tx + s, ty, tz - s), (tx - s, ty, tz + s), x_color, 2)
+        add_line((tx, ty, tz - s), (tx, ty, tz + s), x_color, 2)
+        add_line((tx + s, ty, tz - s), (tx - s, ty, tz + s), x_color, 2)
 
         # Y ラベル（Y軸の先端に、XY平面上に描画）
         tx = axis_origin[0]
         ty = axis_origin[1] + axis_length + label_gap
         tz = axis_origin[2]
         # Y の形を描画
-        self.draw_line_3d((tx - s, ty + s, tz), (tx, ty, tz), y_color, 2)
-        self.draw_line_3d((tx + s, ty + s, tz), (tx, ty, tz), y_color, 2)
-        self.draw_line_3d((tx, ty, tz), (tx, ty - s, tz), y_color, 2)
+        add_line((tx - s, ty + s, tz), (tx, ty, tz), y_color, 2)
+        add_line((tx + s, ty + s, tz), (tx, ty, tz), y_color, 2)
+        add_line((tx, ty, tz), (tx, ty - s, tz), y_color, 2)
 
         # Z ラベル（Z軸の先端に、YZ平面上に描画）
         tx = axis_origin[0]
         ty = axis_origin[1]
         tz = axis_origin[2] + axis_length + label_gap
         # Z の形を描画
-        self.draw_line_3d((tx, ty + s, tz - s), (tx, ty + s, tz + s), z_color, 2)
-        self.draw_line_3d((tx, ty + s, tz + s), (tx, ty - s, tz - s), z_color, 2)
-        self.draw_line_3d((tx, ty - s, tz - s), (tx, ty - s, tz + s), z_color, 2)
+        add_line((tx, ty + s, tz - s), (tx, ty + s, tz + s), z_color, 2)
+        add_line((tx, ty + s, tz + s), (tx, ty - s, tz - s), z_color, 2)
+        add_line((tx, ty - s, tz - s), (tx, ty - s, tz + s), z_color, 2)
 
-        glEnable(GL_LIGHTING)
+        self._axis_lines = (np.array(points, dtype=np.float32), np.array(point_colors, dtype=np.float32),
+                            [tuple(batch) for batch in batches])
+        return self._axis_lines
 
     def draw_water_plane_3d(self):
         """3D水面を描画（半透明、ゆらぎ対応）"""
@@ -965,45 +1255,37 @@ class OpticsSimulator:
             t = self.engine.water_ripple_time
             amplitude = ripple_strength * 15  # 高さの振幅
 
+            # 格子点の高さをまとめて計算（X方向の2項とZ方向の2項の和、vertices[ix * n + iz]）
+            # 時刻・ゆらぎの設定・水面の高さが前回と同じなら（アニメーション停止中など）前回の頂点を使う
+            coords = np.arange(-size, size + step, step)
+            n = len(coords)
+            cache_key = (freq, t, amplitude, water_y, size, step)
+            if self._water_mesh_cache is not None and self._water_mesh_cache[0] == cache_key:
+                vertices = self._water_mesh_cache[1]
+            else:
+                ripple = ((np.sin(coords * freq + t)[:, None] +
+                           (0.5 * np.sin(coords * freq * 2.3 + t * 1.7))[:, None]) +
+                          (0.3 * np.sin(coords * freq * 0.7 + t * 0.8))[None, :] +
+                          (np.sin(coords * freq + t * 1.2) * 0.7)[None, :])
+                vertices = np.empty((n, n, 3), dtype=np.float32)
+                vertices[:, :, 0] = coords[:, None]
+                vertices[:, :, 1] = water_y + ripple * amplitude
+                vertices[:, :, 2] = coords[None, :]
+                self._water_mesh_cache = (cache_key, vertices)
+            triangles, grid_lines = self._get_water_mesh_indices(n, 50 // step)
+
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glVertexPointer(3, GL_FLOAT, 0, vertices)
+
             glColor4f(0.2, 0.5, 0.8, 0.4)
-            for i in range(-size, size, step):
-                glBegin(GL_QUAD_STRIP)
-                for j in range(-size, size + step, step):
-                    for x in [i, i + step]:
-                        # ゆらぎの高さを計算
-                        ripple = (math.sin(x * freq + t) +
-                                  0.5 * math.sin(x * freq * 2.3 + t * 1.7) +
-                                  0.3 * math.sin(j * freq * 0.7 + t * 0.8) +
-                                  math.sin(j * freq + t * 1.2) * 0.7)
-                        y_offset = ripple * amplitude
-                        glVertex3f(x, water_y + y_offset, j)
-                glEnd()
-
-            # グリッド線（ゆらぎあり）
+            glDrawElements(GL_TRIANGLES, len(triangles), GL_UNSIGNED_INT, triangles)
+
+            # グリッド線（ゆらぎあり、同じ格子点を結ぶ）
             glColor4f(0.3, 0.6, 0.9, 0.5)
             glLineWidth(1.0)
-            grid_step = 50
-            glBegin(GL_LINES)
-            for i in range(-10, 11):
-                # X方向の線
-                for j in range(-size, size, step):
-                    x = i * grid_step
-                    ripple1 = (math.sin(x * freq + t) + 0.5 * math.sin(x * freq * 2.3 + t * 1.7) +
-                               0.3 * math.sin(j * freq * 0.7 + t * 0.8) + math.sin(j * freq + t * 1.2) * 0.7)
-                    ripple2 = (math.sin(x * freq + t) + 0.5 * math.sin(x * freq * 2.3 + t * 1.7) +
-                               0.3 * math.sin((j + step) * freq * 0.7 + t * 0.8) + math.sin((j + step) * freq + t * 1.2) * 0.7)
-                    glVertex3f(x, water_y + ripple1 * amplitude, j)
-                    glVertex3f(x, water_y + ripple2 * amplitude, j + step)
-                # Z方向の線
-                for j in range(-size, size, step):
-                    z = i * grid_step
-                    ripple1 = (math.sin(j * freq + t) + 0.5 * math.sin(j * freq * 2.3 + t * 1.7) +
-                               0.3 * math.sin(z * freq * 0.7 + t * 0.8) + math.sin(z * freq + t * 1.2) * 0.7)
-                    ripple2 = (math.sin((j + step) * freq + t) + 0.5 * math.sin((j + step) * freq * 2.3 + t * 1.7) +
-                               0.3 * math.sin(z * freq * 0.7 + t * 0.8) + math.sin(z * freq + t * 1.2) * 0.7)
-                    glVertex3f(j, water_y + ripple1 * amplitude, z)
-                    glVertex3f(j + step, water_y + ripple2 * amplitude, z)
-            glEnd()
+            glDrawElements(GL_LINES, len(grid_lines), GL_UNSIGNED_INT, grid_lines)
+
+            glDisableClientState(GL_VERTEX_ARRAY)
         else:
             # ゆらぎなしの場合、フラットな平面
             glColor4f(0.2, 0.5, 0.8, 0.4)
@@ -1014,17 +1296,16 @@ class OpticsSimulator:
             glVertex3f(-size, water_y, size)
             glEnd()
 
-            # グリッド線
+            # グリッド線（高さ0で作成済みの頂点配列を水面の高さへ移動して描画）
             glColor4f(0.3, 0.6, 0.9, 0.5)
             glLineWidth(1.0)
-            step = 50
-            glBegin(GL_LINES)
-            for i in range(-10, 11):
-                glVertex3f(i * step, water_y, -size)
-                glVertex3f(i * step, water_y, size)
-                glVertex3f(-size, water_y, i * step)
-                glVertex3f(size, water_y, i * step)
-            glEnd()
+            glPushMatrix()
+            glTranslatef(0, water_y, 0)
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glVertexPointer(3, GL_FLOAT, 0, self._water_grid_vertices)
+            glDrawArrays(GL_LINES, 0, len(self._water_grid_vertices))
+            glDisableClientState(GL_VERTEX_ARRAY)
+            glPopMatrix()
 
         glDisable(GL_BLEND)
         glEnable(GL_LIGHTING)
@@ -1033,13 +1314,19 @@ class OpticsSimulator:
         """3Dビュー全体を描画"""
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         self.setup_3d_perspective()
+        if self.heatmap_mode:
+            self.update_heatmaps_if_needed()
+
+        # ビュー座標系の原点（画面中央）
+        half_width = self.view_width / 2
+        half_height = self.view_height / 2
 
         # 球を描画（3D座標を使用）- 不透明なものを先に描画
         for ball_idx, ball in enumerate(self.engine.balls):
             x_3d, y_3d, z_3d = ball['position']
             # ビュー座標系に変換
-            x_3d_view = x_3d - self.view_width / 2
-            y_3d_view = -(y_3d - self.view_height / 2)
+            x_3d_view = x_3d - half_width
+            y_3d_view = -(y_3d - half_height)
 
             # ヒートマップモード時は表面の各点で色を変える
             if self.heatmap_mode:
@@ -1067,27 +1354,7 @@ class OpticsSimulator:
                 self.draw_sphere_3d(light_x_3d, light_y_3d, light_z_3d, 10, (1.0, 1.0, 0.3))
 
         # 光線を描画（3D座標を使用）
-        for ray in self.engine.rays:
-            if len(ray.path) < 2:
-                continue
-
-            # 光線の強度に応じて色を変える
-            intensity_factor = ray.intensity
-            color = (1.0 * intensity_factor, 0.8 * intensity_factor, 0.2 * intensity_factor)
-
-            for i in range(len(ray.path) - 1):
-                p1 = ray.path[i]
-                p2 = ray.path[i + 1]
-
-                # ビュー座標系に変換
-                p1_3d = (p1[0] - self.view_width / 2,
-                        -(p1[1] - self.view_height / 2),
-                        p1[2])
-                p2_3d = (p2[0] - self.view_width / 2,
-                        -(p2[1] - self.view_height / 2),
-                        p2[2])
-
-                self.draw_line_3d(p1_3d, p2_3d, color, 1.5)
+        self.draw_rays_3d()
 
         # 座標軸を描画（画面左下の隅に配置）
         self.draw_axis_3d()
@@ -1095,6 +1362,61 @@ class OpticsSimulator:
         # 水面を最後に描画（半透明なので）
         self.draw_water_plane_3d()
 
+    def draw_rays_3d(self):
+        """全光線の線分を頂点バッファにまとめ、1回の glDrawArrays で描画"""
+        if self._ray_vbo_source is not self.engine.rays_p1:
+            self._upload_ray_vertices()
+        if self._ray_vbo_count == 0:
+            return
+
+        stride = 6 * 4  # xyz + rgb（float32）
+        glDisable(GL_LIGHTING)
+        glLineWidth(1.5)
+        glBindBuffer(GL_ARRAY_BUFFER, self._ray_vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, stride, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, stride, ctypes.c_void_p(3 * 4))
+        glDrawArrays(GL_LINES, 0, self._ray_vbo_count)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glEnable(GL_LIGHTING)
+
+    def _get_view_space_transform(self) -> Tuple[np.ndarray, np.ndarray]:
+        """2D座標系から3Dビュー座標系への変換 (座標 * scale + offset) の係数を取得"""
+        scale = np.array([1.0, -1.0, 1.0])
+        offset = np.array([-self.view_width / 2, self.view_height / 2, 0.0])
+        return scale, offset
+
+    def _upload_ray_vertices(self):
+        """光線の線分配列から頂点データを作り、頂点バッファへ転送（光線が再計算された時のみ）"""
+        p1 = self.engine.rays_p1
+        p2 = self.engine.rays_p2
+        self._ray_vbo_source = p1
+        self._ray_vbo_count = len(p1) * 2
+        if self._ray_vbo_count == 0:
+            return
+
+        vertices = np.empty((self._ray_vbo_count, 6), dtype=np.float32)
+
+        # 線分の始点・終点を交互に並べ、ビュー座標系 (x - w/2, -(y - h/2), z) への変換を1回の演算で行う
+        scale, offset = self._get_view_space_transform()
+        endpoints = np.stack([p1, p2], axis=1).reshape(-1, 3)
+        np.multiply(endpoints, scale, out=endpoints)
+        np.add(endpoints, offset, out=vertices[:, :3], casting='unsafe')
+        # 光線の強度に応じて色を変える（線分の両端で同じ色）
+        intensity = np.repeat(self.engine.rays_seg_intensity, 2).astype(np.float32)
+        vertices[:, 3:] = intensity[:, None] * np.array([1.0, 0.8, 0.2], dtype=np.float32)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self._ray_vbo)
+        if self._ray_vbo_count > self._ray_vbo_capacity:
+            # 足りない時だけ倍々で確保し直す
+            self._ray_vbo_capacity = max(self._ray_vbo_count, self._ray_vbo_capacity * 2)
+            glBufferData(GL_ARRAY_BUFFER, self._ray_vbo_capacity * vertices.itemsize * 6, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
     def draw_light_glow_3d(self, x, y, z, light_angle, light_spread, intensity=1.0):
         """光源からのグロー効果（光の放射）を描画"""
         glDisable(GL_LIGHTING)
@@ -1108,68 +1430,64 @@ class OpticsSimulator:
         glColor4f(bright, bright, bright * 0.8, 1.0)
         glPushMatrix()
         glTranslatef(x, y, z)
-        quadric = gluNewQuadric()
-        gluSphere(quadric, 12, 16, 16)
-        gluDeleteQuadric(quadric)
+        self._draw_unit_sphere(12, 16, 16)
         glPopMatrix()
 
-        # グロー効果（複数の半透明の球で表現）- 強度に応じてサイズと明るさ変化
-        for i in range(3):
-            alpha = (0.3 - i * 0.08) * intensity
-            radius = (20 + i * 15) * (0.5 + intensity * 0.5)
-            glColor4f(bright, bright * 0.95, bright * 0.7, alpha)
-            glPushMatrix()
-            glTranslatef(x, y, z)
-            quadric = gluNewQuadric()
-            gluSphere(quadric, radius, 12, 12)
-            gluDeleteQuadric(quadric)
-            glPopMatrix()
+        # グロー効果（放射状に減衰するテクスチャを貼った、カメラに正対する四角形）- 強度に応じてサイズと明るさ変化
+        radius = 50 * (0.5 + intensity * 0.5)
+        # モデルビュー行列の回転部分の行がカメラの右・上方向（ワールド座標）
+        modelview = glGetFloatv(GL_MODELVIEW_MATRIX)
+        right = np.asarray(modelview)[:3, 0] * radius
+        up = np.asarray(modelview)[:3, 1] * radius
+        center = np.array((x, y, z))
+
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self._glow_texture)
+        glDepthMask(GL_FALSE)  # 半透明のハローで奥の物体を隠さない
+        glColor4f(bright, bright * 0.95, bright * 0.7, 0.66 * intensity)
+        glBegin(GL_QUADS)
+        for (u, v) in ((0, 0), (1, 0), (1, 1), (0, 1)):
+            glTexCoord2f(u, v)
+            glVertex3f(*(center + right * (2 * u - 1) + up * (2 * v - 1)))
+        glEnd()
+        glDepthMask(GL_TRUE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
 
         # 光線（2Dの角度に合わせた方向に照射）
         # light_angle: 0が下向き、正が時計回り
         # 3D座標系: Y軸が上向きなので、下向きは-Y方向
-        center_dir_x = math.sin(light_angle)
-        center_dir_y = -math.cos(light_angle)  # 下向きが基準
+        sin_angle = math.sin(light_angle)
+        cos_angle = math.cos(light_angle)
 
         glLineWidth(2.0)
-        num_rays = 12
         ray_length = 200 * (0.5 + intensity * 0.5)  # 強度に応じて長さ変化
 
-        for i in range(num_rays):
-            # 円周上の角度
-            phi = (2 * math.pi * i) / num_rays
-            # 広がり角度（中心からの角度）
-            theta = light_spread / 2 * 0.8  # 少し狭めに
-
-            # 中心方向からの広がりを計算
-            # X-Y平面での広がり
-            spread_x = math.sin(theta) * math.cos(phi)
-            spread_y = math.sin(theta) * math.sin(phi)
-
-            # 光線の終点方向
-            dir_x = center_dir_x + spread_x * math.cos(light_angle)
-            dir_y = center_dir_y - spread_y
-            dir_z = spread_x * math.sin(light_angle) + math.sin(theta) * math.sin(phi)
-
-            # 正規化
-            length = math.sqrt(dir_x**2 + dir_y**2 + dir_z**2)
-            if length > 0:
-                dir_x /= length
-                dir_y /= length
-                dir_z /= length
-
-            end_x = x + ray_length * dir_x
-            end_y = y + ray_length * dir_y
-            end_z = z + ray_length * dir_z
-
-            # グラデーション効果のある光線（強度に応じた明るさ）
-            ray_alpha = 0.5 * intensity
-            glBegin(GL_LINES)
+        # 広がり角度（中心からの角度、少し狭めに）
+        sin_theta = math.sin(light_spread / 2 * 0.8)
+
+        # 中心方向からの広がり（X-Y平面）を円周上の12本まとめて計算
+        spread_x = sin_theta * self._glow_phi_cos
+        spread_y = sin_theta * self._glow_phi_sin
+
+        # 光線の終点方向（中心方向はsin/-cosで下向きが基準）を正規化
+        dirs = np.empty((len(spread_x), 3))
+        dirs[:, 0] = sin_angle + spread_x * cos_angle
+        dirs[:, 1] = -cos_angle - spread_y
+        dirs[:, 2] = spread_x * sin_angle + spread_y
+        lengths = np.sqrt(np.sum(dirs * dirs, axis=1))
+        np.divide(dirs, lengths[:, None], out=dirs, where=lengths[:, None] > 0)
+        ends = (np.array((x, y, z)) + ray_length * dirs).tolist()
+
+        # グラデーション効果のある光線（強度に応じた明るさ）
+        ray_alpha = 0.5 * intensity
+        glBegin(GL_LINES)
+        for end_x, end_y, end_z in ends:
             glColor4f(bright, bright, bright * 0.6, ray_alpha)
             glVertex3f(x, y, z)
             glColor4f(bright, bright * 0.9, bright * 0.5, 0.0)
             glVertex3f(end_x, end_y, end_z)
-            glEnd()
+        glEnd()
 
         glDisable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
@@ -1179,6 +1497,8 @@ class OpticsSimulator:
         """自然光3Dビュー全体を描画（光線なし、2D光源位置に連動）"""
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         self.setup_3d_perspective()
+        if self.heatmap_mode:
+            self.update_heatmaps_if_needed()
 
         # 2Dの光源位置から3Dライト位置を計算
         light_x_2d, light_y_2d = self.light_position
@@ -1203,73 +1523,29 @@ class OpticsSimulator:
         # 最初の光源位置をOpenGLライトとして設定
         glLightfv(GL_LIGHT0, GL_POSITION, [light_x_3d, light_y_3d, 0, 1.0])
 
-        # ヒートマップモード時は各球の強度を計算
-        ball_intensities = {}
-        max_intensity = 1
-        if self.heatmap_mode:
-            ball_intensities = self.calculate_ball_hit_intensity()
-            if ball_intensities:
-                max_intensity = max(ball_intensities.values()) if max(ball_intensities.values()) > 0 else 1
+        # ビュー座標系の原点（画面中央）と光源の間隔はループの外で一度だけ求める
+        half_width = self.view_width / 2
+        half_height = self.view_height / 2
+        light_z_spacing = self.light_spacing_mm * self.mm_to_pixel
+        # 全光線の線分配列（update_simulation で構築済み）から、球との判定に使う値を一度だけ求める
+        ray_segments = self._get_ball_hit_segments()
 
         # 球を描画（3D座標を使用）- 不透明なものを先に描画
         for ball_idx, ball in enumerate(self.engine.balls):
             x_3d, y_3d, z_3d = ball['position']
             # ビュー座標系に変換
-            x_3d_view = x_3d - self.view_width / 2
-            y_3d_view = -(y_3d - self.view_height / 2)
+            x_3d_view = x_3d - half_width
+            y_3d_view = -(y_3d - half_height)
 
             # 光線が球に当たっているかを判定し、当たった光線の方向と数を記録
             # 3D空間での判定：光線の起点Z座標と球のZ座標が近いかどうかも考慮
-            ball_hit = False
-            hit_ray_dir = None
-            hit_count = 0
             total_rays = len(self.engine.rays)
-            ball_cx, ball_cy, ball_cz = ball['position'][0], ball['position'][1], ball['position'][2]
             ball_r = ball['radius']
 
-            # 光源の間隔を取得
-            light_z_spacing = self.light_spacing_mm * self.mm_to_pixel
-
-            for ray in self.engine.rays:
-                if len(ray.path) < 1:
-                    continue
-
-                # 光線の起点（光源位置）のZ座標を取得
-                ray_origin_z = float(ray.path[0][2]) if len(ray.path[0]) > 2 else 0.0
-
-                # 光線の起点Z座標と球のZ座標が近いかチェック（光源間隔の半分以内）
-                z_tolerance = max(ball_r * 2, light_z_spacing / 2)
-                if abs(ray_origin_z - ball_cz) > z_tolerance:
-                    continue
-
-                # 光線の経路をチェック
-                ray_hits = False
-                for i in range(len(ray.path) - 1):
-                    p1 = ray.path[i]
-                    p2 = ray.path[i + 1]
-                    # 線分と球の交差判定（2D: x, y座標で判定）
-                    p1x, p1y = float(p1[0]), float(p1[1])
-                    p2x, p2y = float(p2[0]), float(p2[1])
-
-                    dx = p2x - p1x
-                    dy = p2y - p1y
-                    line_len = math.sqrt(dx * dx + dy * dy)
-                    if line_len < 0.001:
-                        continue
-                    # 球の中心から線分への最短距離を計算
-                    t = max(0, min(1, ((ball_cx - p1x) * dx + (ball_cy - p1y) * dy) / (line_len * line_len)))
-                    closest_x = p1x + t * dx
-                    closest_y = p1y + t * dy
-                    dist = math.sqrt((ball_cx - closest_x) ** 2 + (ball_cy - closest_y) ** 2)
-                    if dist <= ball_r:
-                        ray_hits = True
-                        if not ball_hit:
-                            ball_hit = True
-                            # 最初にヒットした光線の方向を記録（正規化）
-                            hit_ray_dir = (dx / line_len, dy / line_len)
-                        break
-                if ray_hits:
-                    hit_count += 1
+            # 光線の起点Z座標と球のZ座標の許容差（光源間隔の半分以内）
+            z_tolerance = max(ball_r * 2, light_z_spacing / 2)
+            hit_count, hit_ray_dir = self._find_ball_ray_hits(ray_segments, ball['position'], ball_r, z_tolerance)
+            ball_hit = hit_count > 0
 
             if ball_hit and hit_ray_dir is not None:
                 # 光線の進む方向から光源の方向を計算
@@ -1298,6 +1574,61 @@ class OpticsSimulator:
         # 水面を最後に描画（半透明なので）
         self.draw_water_plane_3d()
 
+    def _get_ball_hit_segments(self):
+        """
+        球と光線の当たり判定（XY平面）に使う線分の値をまとめて取得
+
+        Returns:
+            (始点 (M, 3), 方向の X, Y (M,), XY平面での長さ (M,), 線分が属する光線の起点Z座標 (M,),
+             線分が属する光線のインデックス (M,))、線分がなければ None
+        """
+        # 線分配列は update_simulation で作り直されるので、同じ配列の間は前回の結果を使う
+        p1 = self.engine.rays_p1
+        if self._ball_hit_segments is not None and self._ball_hit_segments[0] is p1:
+            return self._ball_hit_segments[1]
+        if len(p1) == 0:
+            self._ball_hit_segments = (p1, None)
+            return None
+
+        dx = self.engine.rays_p2[:, 0] - p1[:, 0]
+        dy = self.engine.rays_p2[:, 1] - p1[:, 1]
+        line_len = np.sqrt(dx * dx + dy * dy)
+
+        # 線分は光線ごとに連続して並ぶので、各光線の先頭線分の始点が光線の起点
+        ownership = self.engine.rays_ownership
+        index = np.arange(len(p1))
+        run_start = np.maximum.accumulate(np.where(np.r_[True, ownership[1:] != ownership[:-1]], index, 0))
+        origin_z = p1[run_start, 2]
+        segments = (p1, dx, dy, line_len, origin_z, ownership)
+        self._ball_hit_segments = (p1, segments)
+        return segments
+
+    def _find_ball_ray_hits(self, segments, ball_pos, ball_r: float,
+                            z_tolerance: float) -> Tuple[int, Optional[Tuple[float, float]]]:
+        """
+        球に当たる光線を数える（XY平面で線分と球の中心の最短距離が半径以内なら当たり）
+
+        Args:
+            segments: _get_ball_hit_segments() の戻り値
+            ball_pos: 球の中心 (x, y, z)
+            ball_r: 球の半径
+            z_tolerance: 光線の起点Z座標と球のZ座標の許容差
+
+        Returns:
+            (当たった光線の数, 最初に当たった光線の当たった線分の向き（XY平面で正規化）)
+        """
+        if segments is None:
+            return 0, None
+        p1, dx, dy, line_len, origin_z, ownership = segments
+        hit_count, first = count_ball_ray_hits(p1, dx, dy, line_len, origin_z, ownership,
+                                               ball_pos, ball_r, z_tolerance)
+        if hit_count == 0:
+            return 0, None
+
+        # 線分は光線順・経路順に並ぶので、最初の当たりが最初にヒットした光線の当たった線分
+        hit_ray_dir = (float(dx[first] / line_len[first]), float(dy[first] / line_len[first]))
+        return hit_count, hit_ray_dir
+
     def render_raytracing(self):
         """フォンシェーディングで光源・水面・球を高速描画"""
         render_width = 500
@@ -1435,7 +1766,7 @@ class OpticsSimulator:
             self.screen.blit(self.raytracing_image, (0, 0))
 
         # 操作説明
-        help_text = self.font.render("2: 2Dモード  3: 3Dモード  4: レイトレ再描画", True, (255, 255, 255))
+        help_text = self._render_text("2: 2Dモード  3: 3Dモード  4: レイトレ再描画", self.font, (255, 255, 255))
         self.screen.blit(help_text, (10, 10))
 
     def draw_raytracing_2d(self):
@@ -1456,29 +1787,29 @@ class OpticsSimulator:
                         (offset_x, offset_y, self.view_width * 2 + self.view_margin, self.view_height), 2)
 
         # タイトル
-        title = self.title_font.render("レイトレーシング（4キーで再描画）", True, self.COLOR_TEXT)
+        title = self._render_text("レイトレーシング（4キーで再描画）", self.title_font)
         self.screen.blit(title, (offset_x, 20))
 
     def _set_light_angle(self, angle_deg: float):
         """光の角度を設定（スライダー用コールバック）"""
-        self.light_angle = np.radians(angle_deg)
-        self.update_simulation()
+        self.light_angle = math.radians(angle_deg)
+        self.request_simulation_update()
 
     def _set_light_spread(self, spread_deg: float):
         """光の広がりを設定（スライダー用コールバック）"""
-        self.light_spread = np.radians(spread_deg)
-        self.update_simulation()
+        self.light_spread = math.radians(spread_deg)
+        self.request_simulation_update()
 
     def _set_water_level(self, level: float):
         """水面位置を設定（スライダー用コールバック）"""
         self.engine.water_level = level
-        self.update_simulation()
+        self.request_simulation_update()
 
     def _set_refractive_index(self, value: float):
         """屈折率を設定（スライダー用コールバック）"""
         # 小数第2位で丸める
         self.engine.water_refractive_index = round(value, 2)
-        self.update_simulation()
+        self.request_simulation_update()
 
     def _set_light_intensity(self, value: float):
         """光の強度を設定（スライダー用コールバック）"""
@@ -1502,17 +1833,17 @@ class OpticsSimulator:
     def _set_light_count(self, value: int):
         """光源の個数を設定（スライダー用コールバック）"""
         self.light_count = value
-        self.update_simulation()
+        self.request_simulation_update()
 
     def _set_light_spacing_mm(self, value: float):
         """光源の間隔を設定（mm単位、スライダー用コールバック）"""
         self.light_spacing_mm = round(value, 1)
-        self.update_simulation()
+        self.request_simulation_update()
 
     def _set_water_ripple(self, value: float):
         """水面ゆらぎ強度を設定（スライダー用コールバック）"""
         self.engine.water_ripple_strength = round(value, 2)
-        self.update_simulation()
+        self.request_simulation_update()
 
     def _set_ball_rotation_rpm(self, value: float):
         """球の回転速度を設定（rpm単位、スライダー用コールバック）"""
@@ -1539,61 +1870,25 @@ class OpticsSimulator:
             ball_z = start_z - i * z_spacing
             self.engine.add_ball((ball_x, ball_y, ball_z), ball_radius)
 
-        # 光線を再計算
-        self.update_simulation()
+        # 光線の再計算を予約
+        self.request_simulation_update()
 
     def calculate_ball_intensity(self):
-        """球に当たった光の強度を計算"""
-        self.ball_intensity_map = {}
+        """球に当たった光の強度を計算（全光線の線分を一括で交差判定）"""
+        # 角度(-180～179°)ごとの強度（インデックス = 角度 + 180）、配列は使い回す
+        self.ball_intensity_map.fill(0)
 
         if not self.engine.balls:
             return
 
         ball = self.engine.balls[0]
-        ball_pos = np.array(ball['position'])
+        ball_pos = np.array(ball['position'], dtype=float)
         ball_radius = ball['radius']
 
-        # 各光線について、球に当たった位置と強度を記録
-        for ray in self.engine.rays:
-            if len(ray.path) < 2:
-                continue
-
-            for i in range(len(ray.path) - 1):
-                p1 = np.array(ray.path[i], dtype=float)
-                p2 = np.array(ray.path[i + 1], dtype=float)
-
-                # 球との交点を計算
-                d = p2 - p1
-                f = p1 - ball_pos
-
-                a = np.dot(d, d)
-                if a == 0:
-                    continue
-
-                b = 2 * np.dot(f, d)
-                c = np.dot(f, f) - ball_radius ** 2
-
-                discriminant = b * b - 4 * a * c
-
-                if discriminant >= 0:
-                    discriminant = np.sqrt(discriminant)
-                    t1 = (-b - discriminant) / (2 * a)
-
-                    if 0 <= t1 <= 1:
-                        # 交点の位置
-                        hit_point = p1 + t1 * d
-
-                        # 球の中心からの角度を計算
-                        diff = hit_point - ball_pos
-                        angle = np.arctan2(diff[1], diff[0])
-
-                        # 角度を度数に変換（-180～180）
-                        angle_deg = int(np.degrees(angle))
-
-                        # その角度の強度を累積
-                        if angle_deg not in self.ball_intensity_map:
-                            self.ball_intensity_map[angle_deg] = 0
-                        self.ball_intensity_map[angle_deg] += ray.intensity
+        # 全光線の線分配列（エンジンのSoA）で球との交点を求め、角度ごとに強度を累積
+        accumulate_ball_intensity(self.engine.rays_p1, self.engine.rays_p2,
+                                  self.engine.rays_seg_intensity,
+                                  ball_pos, ball_radius, self.ball_intensity_map)
 
     def get_intensity_color(self, intensity: float, max_intensity: float) -> Tuple[int, int, int]:
         """強度から色を計算（青→緑→黄→赤）"""
@@ -1624,77 +1919,33 @@ class OpticsSimulator:
 
         return (r, g, b)
 
-    def calculate_ball_hit_intensity(self):
-        """各球に当たった光線の数を計算してヒートマップ用の強度を返す"""
-        ball_intensities = {}
-
-        if not self.engine.balls:
-            return ball_intensities
-
-        for ball_idx, ball in enumerate(self.engine.balls):
-            ball_cx, ball_cy, ball_cz = ball['position']
-            ball_r = ball['radius']
-            hit_count = 0
-
-            for ray in self.engine.rays:
-                if len(ray.path) < 2:
-                    continue
-
-                # 光線の経路をチェック（3D空間での判定）
-                for i in range(len(ray.path) - 1):
-                    p1 = ray.path[i]
-                    p2 = ray.path[i + 1]
-                    p1x, p1y = float(p1[0]), float(p1[1])
-                    p2x, p2y = float(p2[0]), float(p2[1])
-                    p1z = float(p1[2]) if len(p1) > 2 else 0.0
-                    p2z = float(p2[2]) if len(p2) > 2 else 0.0
-
-                    # 3D距離を計算
-                    dx = p2x - p1x
-                    dy = p2y - p1y
-                    dz = p2z - p1z
-                    line_len_sq = dx * dx + dy * dy + dz * dz
-                    if line_len_sq < 0.001:
-                        continue
-
-                    # 球の中心から線分への最短距離を計算（3D）
-                    t = max(0, min(1, ((ball_cx - p1x) * dx + (ball_cy - p1y) * dy + (ball_cz - p1z) * dz) / line_len_sq))
-                    closest_x = p1x + t * dx
-                    closest_y = p1y + t * dy
-                    closest_z = p1z + t * dz
-                    dist = math.sqrt((ball_cx - closest_x) ** 2 + (ball_cy - closest_y) ** 2 + (ball_cz - closest_z) ** 2)
-                    if dist <= ball_r:
-                        hit_count += 1
-                        break
-
-            ball_intensities[ball_idx] = hit_count
-
-        return ball_intensities
-
     def get_heatmap_color(self, intensity: float, max_intensity: float) -> Tuple[float, float, float]:
         """強度からヒートマップ色を計算（青→シアン→緑→黄→赤）OpenGL用に0-1の範囲で返す"""
-        if max_intensity == 0 or intensity == 0:
-            return (0.0, 0.0, 1.0)  # 青（光が当たっていない）
+        return tuple(float(c) for c in self.get_heatmap_color_vec(intensity, max_intensity))
 
-        # 正規化 (0.0 ~ 1.0)
-        normalized = min(1.0, intensity / max_intensity)
+    def get_heatmap_color_vec(self, intensities: np.ndarray, max_intensity: float) -> np.ndarray:
+        """強度配列からまとめてヒートマップ色を計算（get_heatmap_color と同じ配色、shape: (..., 3) の0-1）"""
+        intensities = np.asarray(intensities, dtype=float)
+        if max_intensity == 0:
+            return np.broadcast_to(np.array([0.0, 0.0, 1.0]), intensities.shape + (3,))
 
-        if normalized < 0.25:
-            # 青 → シアン
-            ratio = normalized / 0.25
-            return (0.0, ratio, 1.0)
-        elif normalized < 0.5:
-            # シアン → 緑
-            ratio = (normalized - 0.25) / 0.25
-            return (0.0, 1.0, 1.0 - ratio)
-        elif normalized < 0.75:
-            # 緑 → 黄
-            ratio = (normalized - 0.5) / 0.25
-            return (ratio, 1.0, 0.0)
-        else:
-            # 黄 → 赤
-            ratio = (normalized - 0.75) / 0.25
-            return (1.0, 1.0 - ratio, 0.0)
+        # 正規化 (0.0 ~ 1.0)
+        normalized = np.minimum(1.0, intensities / max_intensity)
+        # 0.25 刻みの区間番号と区間内の位置
+        segment = np.minimum((normalized / 0.25).astype(np.int32), 3)
+        ratio = (normalized - segment * 0.25) / 0.25
+
+        zeros = np.zeros_like(normalized)
+        ones = np.ones_like(normalized)
+        # 青 → シアン → 緑 → 黄 → 赤
+        r = np.choose(segment, [zeros, zeros, ratio, ones])
+        g = np.choose(segment, [ratio, ones, ones, 1.0 - ratio])
+        b = np.choose(segment, [ones, 1.0 - ratio, zeros, zeros])
+        colors = np.stack([r, g, b], axis=-1)
+
+        # 光が当たっていない点は青
+        colors[intensities == 0] = (0.0, 0.0, 1.0)
+        return colors
 
     def draw_grid(self, surface: pygame.Surface, offset_x: int, offset_y: int):
         """グリッドを描画"""
@@ -1714,40 +1965,218 @@ class OpticsSimulator:
                 (offset_x + self.view_width, offset_y + y), 1
             )
 
-    def draw_side_view(self):
-        """横図ビューを描画"""
-        offset_x = self.ui_panel_width + self.view_margin
-        offset_y = 60
-
-        # ズーム適用したサーフェスを作成
+    def _update_background_cache(self):
+        """グリッド・空気・水・水面線の背景サーフェスを必要な時だけ再生成"""
+        # グリッド（ズームに依存しないので一度だけ作成、線の終端1ピクセル分の余裕を持たせ、線以外は透過）
+        if self._grid_surface is None:
+            self._grid_surface = pygame.Surface((self.view_width + 1, self.view_height + 1))
+            self._grid_surface.fill(self.COLOR_BG)
+            self._grid_surface.set_colorkey(self.COLOR_BG)
+            self.draw_grid(self._grid_surface, 0, 0)
+
+        # 横図・上面図の背景は、それぞれの入力が変わった方だけ作り直す
+        side_key = (self.engine.water_level, self.side_view_zoom)
+        if self._side_bg_cache_key != side_key:
+            self._side_bg_cache_key = side_key
+            self._build_side_background()
+
+        top_key = self.top_view_zoom
+        if self._top_bg_cache_key != top_key:
+            self._top_bg_cache_key = top_key
+            self._build_top_background()
+
+    def _build_side_background(self):
+        """横図の背景（空気・水・水面線）のサーフェスを作成"""
         zoom = self.side_view_zoom
         zoomed_width = int(self.view_width * zoom)
         zoomed_height = int(self.view_height * zoom)
-
-        # 背景
-        view_surface = pygame.Surface((zoomed_width, zoomed_height), pygame.SRCALPHA)
-
-        # グリッド
-        self.draw_grid(self.screen, offset_x, offset_y)
+        self._side_bg_surface = pygame.Surface((zoomed_width, zoomed_height), pygame.SRCALPHA)
 
         # 空気領域
         air_rect = pygame.Rect(0, 0, int(zoomed_width), int(self.engine.water_level * zoom))
-        pygame.draw.rect(view_surface, self.COLOR_AIR, air_rect)
+        pygame.draw.rect(self._side_bg_surface, self.COLOR_AIR, air_rect)
 
         # 水領域
         water_rect = pygame.Rect(
             0, int(self.engine.water_level * zoom),
             int(zoomed_width), int(zoomed_height - self.engine.water_level * zoom)
         )
-        pygame.draw.rect(view_surface, self.COLOR_WATER, water_rect)
+        pygame.draw.rect(self._side_bg_surface, self.COLOR_WATER, water_rect)
 
         # 水面の線
         pygame.draw.line(
-            view_surface, (0, 100, 200),
+            self._side_bg_surface, (0, 100, 200),
             (0, int(self.engine.water_level * zoom)),
             (int(zoomed_width), int(self.engine.water_level * zoom)), 3
         )
 
+    def _build_top_background(self):
+        """上面図の背景（全体が水面）のサーフェスを作成"""
+        zoom = self.top_view_zoom
+        zoomed_width = int(self.view_width * zoom)
+        zoomed_height = int(self.view_height * zoom)
+        self._top_bg_surface = pygame.Surface((zoomed_width, zoomed_height), pygame.SRCALPHA)
+        pygame.draw.rect(self._top_bg_surface, self.COLOR_WATER, (0, 0, zoomed_width, zoomed_height))
+
+    def _blit_light_sprite(self, surface: pygame.Surface, center: Tuple[int, int], radius: int, outline_width: int):
+        """光源（黄色の円と輪郭）を描画（半径ごとに作ったスプライトを転写するだけ）"""
+        if radius <= 0:
+            return
+        key = (radius, outline_width)
+        sprite = self._light_sprite_cache.get(key)
+        if sprite is None:
+            # ズーム変更で増えすぎないよう、古いものから捨てて最大8件に抑える
+            if len(self._light_sprite_cache) >= 8:
+                del self._light_sprite_cache[next(iter(self._light_sprite_cache))]
+            sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, self.COLOR_LIGHT_SOURCE, (radius, radius), radius)
+            pygame.draw.circle(sprite, (200, 200, 0), (radius, radius), radius, outline_width)
+            self._light_sprite_cache[key] = sprite
+        surface.blit(sprite, (center[0] - radius, center[1] - radius))
+
+    def _get_view_surface(self, view: str, width: int, height: int,
+                          background: pygame.Surface) -> pygame.Surface:
+        """
+        ビューの作業用サーフェスを取得し、背景で初期化
+
+        サーフェスは (ビュー, 幅, 高さ) ごとに使い回し、毎フレームの確保を避ける。
+        ズーム変更で増えすぎないよう、直近3サイズ分だけ保持する。
+        """
+        key = (view, width, height)
+        surface = self._view_surface_cache.pop(key, None)
+        if surface is None:
+            # 画面と同じピクセル形式にしておき、画面への転写で形式変換が起きないようにする
+            surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+            view_keys = [k for k in self._view_surface_cache if k[0] == view]
+            if len(view_keys) >= 3:
+                del self._view_surface_cache[view_keys[0]]
+        # 末尾に入れ直して最近使った順を保つ
+        self._view_surface_cache[key] = surface
+
+        # 透明で塗りつぶしてから背景を転写（MAX合成で背景のRGBAをそのまま写す）
+        surface.fill((0, 0, 0, 0))
+        surface.blit(background, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        return surface
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _compute_view_transform(view_width: int, view_height: int, zoom: float,
+                                pan_x: int, pan_y: int) -> Tuple[int, int, int, int]:
+        """
+        ズーム済みビューサーフェスの切り取り位置と表示位置を計算
+
+        Returns:
+            (crop_x, crop_y, dest_x, dest_y)
+            crop: ズーム済みサーフェス上の切り取り開始位置（拡大時のみ）
+            dest: ビュー左上からの表示位置（縮小時は中央配置）
+            画面上の位置 = ビュー左上 + dest + int(ワールド座標 * zoom) - crop
+        """
+        zoomed_width = int(view_width * zoom)
+        zoomed_height = int(view_height * zoom)
+
+        if zoom > 1.0:
+            # ズームした画像の中央部分を切り取る（パンオフセットを適用）
+            crop_x = max(0, min(zoomed_width - view_width,
+                                (zoomed_width - view_width) // 2 - int(pan_x * zoom)))
+            crop_y = max(0, min(zoomed_height - view_height,
+                                (zoomed_height - view_height) // 2 - int(pan_y * zoom)))
+            return crop_x, crop_y, 0, 0
+        elif zoom < 1.0:
+            # 縮小時は中央に配置
+            return 0, 0, (view_width - zoomed_width) // 2, (view_height - zoomed_height) // 2
+        return 0, 0, 0, 0
+
+    def _get_view_transform(self, zoom: float, pan_offset: List[int]) -> Tuple[int, int, int, int]:
+        """ビューのズーム・パン状態から (crop_x, crop_y, dest_x, dest_y) を取得"""
+        return self._compute_view_transform(self.view_width, self.view_height, zoom,
+                                            pan_offset[0], pan_offset[1])
+
+    def _view_at(self, mouse_pos: Tuple[int, int]) -> Optional[str]:
+        """マウス位置にある2Dビューの名前（'side' / 'top'）を返す（どちらでもなければNone）"""
+        for view, rect in self._view_rects.items():
+            if rect.collidepoint(mouse_pos):
+                return view
+        return None
+
+    def _side_world_to_screen(self, world_pos: Tuple[float, float]) -> Tuple[int, int]:
+        """横図のワールド座標を、ズーム・パンを考慮した画面座標に変換"""
+        zoom = self.side_view_zoom
+        rect = self._view_rects['side']
+        crop_x, crop_y, dest_x, dest_y = self._get_view_transform(zoom, self.side_view_offset)
+        return (int(world_pos[0] * zoom) - crop_x + dest_x + rect.x,
+                int(world_pos[1] * zoom) - crop_y + dest_y + rect.y)
+
+    def _side_screen_to_world(self, screen_pos: Tuple[int, int]) -> Tuple[float, float]:
+        """画面座標を、ズーム・パンを考慮した横図のワールド座標に変換"""
+        zoom = self.side_view_zoom
+        rect = self._view_rects['side']
+        crop_x, crop_y, dest_x, dest_y = self._get_view_transform(zoom, self.side_view_offset)
+        return ((screen_pos[0] - rect.x - dest_x + crop_x) / zoom,
+                (screen_pos[1] - rect.y - dest_y + crop_y) / zoom)
+
+    def _blit_view_surface(self, view_surface: pygame.Surface, zoom: float, pan_offset: List[int],
+                           offset_x: int, offset_y: int):
+        """ズーム済みビューサーフェスを画面のビュー領域に描画"""
+        crop_x, crop_y, dest_x, dest_y = self._get_view_transform(zoom, pan_offset)
+
+        if zoom > 1.0:
+            crop_rect = pygame.Rect(crop_x, crop_y, self.view_width, self.view_height)
+            self.screen.blit(view_surface, (offset_x, offset_y), crop_rect)
+        elif zoom < 1.0:
+            # 縮小時は中央に配置（ビューサーフェスは既にズーム後のサイズで描画済みなので
+            # スケールせずにそのまま転送する）
+            self.screen.blit(view_surface, (offset_x + dest_x, offset_y + dest_y))
+        else:
+            self.screen.blit(view_surface, (offset_x, offset_y))
+
+    def _blit_cached_view_region(self, view: str, cache_key: tuple, offset_x: int, offset_y: int) -> bool:
+        """入力が前回と同じなら、前回合成したビュー領域を画面に転写してTrueを返す"""
+        cached = self._view_region_cache.get(view)
+        if cached is None or cached[0] != cache_key:
+            return False
+        self.screen.blit(cached[1], (offset_x, offset_y))
+        return True
+
+    def _store_view_region(self, view: str, cache_key: tuple, offset_x: int, offset_y: int):
+        """合成済みのビュー領域（グリッドの終端1ピクセルを含む）を画面から保存"""
+        rect = pygame.Rect(offset_x, offset_y, self.view_width + 1, self.view_height + 1).clip(self.screen.get_rect())
+        self._view_region_cache[view] = (cache_key, self.screen.subsurface(rect).copy())
+
+    def _draw_view_frame(self, offset_x: int, offset_y: int, title_text: str):
+        """ビューの枠線とタイトルを描画"""
+        pygame.draw.rect(self.screen, (100, 100, 100), (offset_x, offset_y, self.view_width, self.view_height), 2)
+        title = self._render_text(title_text, self.title_font)
+        self.screen.blit(title, (offset_x, 20))
+
+    def draw_side_view(self):
+        """横図ビューを描画"""
+        offset_x = self.ui_panel_width + self.view_margin
+        offset_y = 60
+
+        # シミュレーションとズームが前回と同じなら合成済みの画像を使い回す
+        zoom = self.side_view_zoom
+        cache_key = (self._simulation_generation, zoom, tuple(self.side_view_offset))
+        if self._blit_cached_view_region('side', cache_key, offset_x, offset_y):
+            self._draw_view_frame(offset_x, offset_y, "横図（側面図）")
+            return
+
+        # ズーム適用したサーフェスを作成
+        zoomed_width = int(self.view_width * zoom)
+        zoomed_height = int(self.view_height * zoom)
+
+        # 描画関数と繰り返し参照する属性をローカル変数に束縛
+        draw_circle = pygame.draw.circle
+        draw_line = pygame.draw.line
+        draw_lines = pygame.draw.lines
+        ray_rgb = self.COLOR_RAY[:3]
+
+        # 背景（空気・水・水面線はキャッシュから転写）
+        self._update_background_cache()
+        view_surface = self._get_view_surface('side', zoomed_width, zoomed_height, self._side_bg_surface)
+
+        # グリッド
+        self.screen.blit(self._grid_surface, (offset_x, offset_y))
+
         # 球を描画（光強度に応じて色付け）
         for ball in self.engine.balls:
             pos_3d = ball['position']
@@ -1761,98 +2190,94 @@ class OpticsSimulator:
             zoomed_radius = radius * zoom
 
             # 球をシンプルな円として描画
-            pygame.draw.circle(view_surface, self.COLOR_BALL, 
-                             (int(zoomed_pos[0]), int(zoomed_pos[1])), int(zoomed_radius))
+            draw_circle(view_surface, self.COLOR_BALL,
+                        (int(zoomed_pos[0]), int(zoomed_pos[1])), int(zoomed_radius))
             # 球の輪郭
-            pygame.draw.circle(view_surface, (200, 50, 50), 
-                             (int(zoomed_pos[0]), int(zoomed_pos[1])), int(zoomed_radius), 2)
+            draw_circle(view_surface, (200, 50, 50),
+                        (int(zoomed_pos[0]), int(zoomed_pos[1])), int(zoomed_radius), 2)
 
         # 光線を描画（X-Y平面への投影）
-        for ray in self.engine.rays:
-            if len(ray.path) > 1:
-                # 3D座標からX-Y平面（正面図）へ投影
-                points = [(int(p[0] * zoom), int(p[1] * zoom)) for p in ray.path]
-                # 光線の強度に応じて色を変える
-                alpha = int(ray.intensity * 255)
-                color = (*self.COLOR_RAY[:3], min(alpha, 255))
+        p1 = self.engine.rays_p1
+        if len(p1) > 0:
+            ownership = self.engine.rays_ownership
+
+            # 全線分の端点をまとめて横図座標に変換（3D座標からX-Y平面（正面図）へ投影）
+            start_points = (p1[:, :2] * zoom).astype(int)
+            end_points = (self.engine.rays_p2[:, :2] * zoom).astype(int)
+
+            # 光線ごとの線分範囲 [first, last] と線の色（強度→アルファ）
+            firsts = np.flatnonzero(np.r_[True, ownership[1:] != ownership[:-1]])
+            lasts = np.r_[firsts[1:], len(ownership)] - 1
+            alphas = np.minimum((self.engine.rays_seg_intensity[firsts] * 255).astype(int), 255)
+
+            for first, last, alpha in zip(firsts.tolist(), lasts.tolist(), alphas.tolist()):
+                points = start_points[first:last + 1].tolist()
+                points.append(end_points[last].tolist())
+                color = (*ray_rgb, alpha)
 
-                for i in range(len(points) - 1):
-                    pygame.draw.line(view_surface, color, points[i], points[i + 1], 2)
+                # 経路全体を1回の描画呼び出しで描く
+                draw_lines(view_surface, color, False, points, 2)
 
         # 光源を描画
         zoomed_light_pos = (int(self.light_position[0] * zoom), int(self.light_position[1] * zoom))
-        pygame.draw.circle(view_surface, self.COLOR_LIGHT_SOURCE, zoomed_light_pos, int(10 * zoom))
-        pygame.draw.circle(view_surface, (200, 200, 0), zoomed_light_pos, int(10 * zoom), 2)
+        self._blit_light_sprite(view_surface, zoomed_light_pos, int(10 * zoom), 2)
 
         # 光の方向を示す矢印を描画
         arrow_length = 30 * zoom
         arrow_end = (
-            int(zoomed_light_pos[0] + arrow_length * np.sin(self.light_angle)),
-            int(zoomed_light_pos[1] + arrow_length * np.cos(self.light_angle))
+            int(zoomed_light_pos[0] + arrow_length * self._light_sin),
+            int(zoomed_light_pos[1] + arrow_length * self._light_cos)
         )
-        pygame.draw.line(view_surface, (255, 255, 0), zoomed_light_pos, arrow_end, int(3 * zoom))
+        draw_line(view_surface, (255, 255, 0), zoomed_light_pos, arrow_end, int(3 * zoom))
 
-        # 光の広がり範囲を示す扇形の線
-        spread_left = self.light_angle - self.light_spread / 2
-        spread_right = self.light_angle + self.light_spread / 2
+        # 光の広がり範囲を示す扇形の線（sin/cos は update_simulation で計算済み）
         spread_len = 25 * zoom
         spread_left_end = (
-            int(zoomed_light_pos[0] + spread_len * np.sin(spread_left)),
-            int(zoomed_light_pos[1] + spread_len * np.cos(spread_left))
+            int(zoomed_light_pos[0] + spread_len * self._spread_sin_l),
+            int(zoomed_light_pos[1] + spread_len * self._spread_cos_l)
         )
         spread_right_end = (
-            int(zoomed_light_pos[0] + spread_len * np.sin(spread_right)),
-            int(zoomed_light_pos[1] + spread_len * np.cos(spread_right))
+            int(zoomed_light_pos[0] + spread_len * self._spread_sin_r),
+            int(zoomed_light_pos[1] + spread_len * self._spread_cos_r)
         )
-        pygame.draw.line(view_surface, (255, 200, 0, 150), zoomed_light_pos, spread_left_end, max(1, int(zoom)))
-        pygame.draw.line(view_surface, (255, 200, 0, 150), zoomed_light_pos, spread_right_end, max(1, int(zoom)))
+        draw_line(view_surface, (255, 200, 0, 150), zoomed_light_pos, spread_left_end, max(1, int(zoom)))
+        draw_line(view_surface, (255, 200, 0, 150), zoomed_light_pos, spread_right_end, max(1, int(zoom)))
 
         # ビューサーフェスを画面に描画（中央部分を切り取って表示）
-        if zoom > 1.0:
-            # ズームした画像の中央部分を切り取る（パンオフセットを適用）
-            crop_x = max(0, min(zoomed_width - self.view_width,
-                                (zoomed_width - self.view_width) // 2 - int(self.side_view_offset[0] * zoom)))
-            crop_y = max(0, min(zoomed_height - self.view_height,
-                                (zoomed_height - self.view_height) // 2 - int(self.side_view_offset[1] * zoom)))
-            crop_width = min(self.view_width, zoomed_width)
-            crop_height = min(self.view_height, zoomed_height)
-            crop_rect = pygame.Rect(crop_x, crop_y, crop_width, crop_height)
-            cropped_surface = view_surface.subsurface(crop_rect)
-            self.screen.blit(cropped_surface, (offset_x, offset_y))
-        elif zoom < 1.0:
-            # 縮小時は中央に配置
-            scaled_surface = pygame.transform.smoothscale(view_surface, (int(self.view_width * zoom), int(self.view_height * zoom)))
-            center_x = offset_x + (self.view_width - int(self.view_width * zoom)) // 2
-            center_y = offset_y + (self.view_height - int(self.view_height * zoom)) // 2
-            self.screen.blit(scaled_surface, (center_x, center_y))
-        else:
-            self.screen.blit(view_surface, (offset_x, offset_y))
+        self._blit_view_surface(view_surface, zoom, self.side_view_offset, offset_x, offset_y)
+        self._store_view_region('side', cache_key, offset_x, offset_y)
 
-        # 枠線
-        pygame.draw.rect(self.screen, (100, 100, 100), (offset_x, offset_y, self.view_width, self.view_height), 2)
-
-        # タイトル
-        title = self.title_font.render("横図（側面図）", True, self.COLOR_TEXT)
-        self.screen.blit(title, (offset_x, 20))
+        # 枠線とタイトル
+        self._draw_view_frame(offset_x, offset_y, "横図（側面図）")
 
     def draw_top_view(self):
         """上面図ビューを描画（真上から見た水槽）"""
         offset_x = self.ui_panel_width + self.view_width + self.view_margin * 2
         offset_y = 60
 
-        # ズーム適用
+        # シミュレーションとズームが前回と同じなら合成済みの画像を使い回す
         zoom = self.top_view_zoom
+        cache_key = (self._simulation_generation, zoom, tuple(self.top_view_offset))
+        if self._blit_cached_view_region('top', cache_key, offset_x, offset_y):
+            self._draw_view_frame(offset_x, offset_y, "上面図（真上から）")
+            return
+
+        # ズーム適用
         zoomed_width = int(self.view_width * zoom)
         zoomed_height = int(self.view_height * zoom)
 
-        # 背景
-        view_surface = pygame.Surface((zoomed_width, zoomed_height), pygame.SRCALPHA)
+        # 描画関数と繰り返し参照する属性をローカル変数に束縛
+        draw_circle = pygame.draw.circle
+        draw_lines = pygame.draw.lines
+        ray_rgb = self.COLOR_RAY[:3]
+        center_x = (self.view_width // 2) * zoom
 
-        # グリッド
-        self.draw_grid(self.screen, offset_x, offset_y)
+        # 背景（水面はキャッシュから転写）
+        self._update_background_cache()
+        view_surface = self._get_view_surface('top', zoomed_width, zoomed_height, self._top_bg_surface)
 
-        # 水面（全体が水面）
-        pygame.draw.rect(view_surface, self.COLOR_WATER, (0, 0, zoomed_width, zoomed_height))
+        # グリッド
+        self.screen.blit(self._grid_surface, (offset_x, offset_y))
 
         # 上面図の座標系（真上から見下ろした図）：
         # X軸 = 左右方向（画面中央に固定）
@@ -1861,7 +2286,7 @@ class OpticsSimulator:
         #      横図で光源が下にある → 上面図では光源が下（球との距離が近い）
 
         # 光源（ハロゲン）の位置: 横図のY座標（高さ）を上面図のY座標に変換
-        top_light_x = (self.view_width // 2) * zoom  # 画面中央（X軸は固定）
+        top_light_x = center_x  # 画面中央（X軸は固定）
         # 横図のY座標を上面図のY座標に変換（横図で上にあるほど、上面図でも上）
         # 横図: Y=0が上、Y=view_heightが下
         # 上面図: Y=0が上、Y=view_heightが下
@@ -1882,66 +2307,52 @@ class OpticsSimulator:
             light_x = int(top_light_x + light_offset_x)
             light_y = int(top_light_y)
             # 丸い光源を描画
-            pygame.draw.circle(view_surface, self.COLOR_LIGHT_SOURCE, (light_x, light_y), light_radius)
-            pygame.draw.circle(view_surface, (200, 200, 0), (light_x, light_y), light_radius, max(1, int(2 * zoom)))
+            self._blit_light_sprite(view_surface, (light_x, light_y), light_radius, max(1, int(2 * zoom)))
 
         # 球を描画（横図のY座標を上面図のY座標に変換、Z座標でX位置をオフセット）
         for ball in self.engine.balls:
             pos_3d = ball['position']
             radius = ball['radius']
             # Z座標を上面図のX方向にオフセット（-Z方向が右側）
-            top_x = int((self.view_width // 2) * zoom - pos_3d[2] * zoom)
+            top_x = int(center_x - pos_3d[2] * zoom)
             top_y = int(pos_3d[1] * zoom)  # 3D座標のY座標をそのまま使用
-            pygame.draw.circle(view_surface, self.COLOR_BALL, (top_x, top_y), int(radius * zoom))
-            pygame.draw.circle(view_surface, (200, 50, 50), (top_x, top_y), int(radius * zoom), max(2, int(2 * zoom)))
+            draw_circle(view_surface, self.COLOR_BALL, (top_x, top_y), int(radius * zoom))
+            draw_circle(view_surface, (200, 50, 50), (top_x, top_y), int(radius * zoom), max(2, int(2 * zoom)))
 
         # 光線を描画（X-Z平面への投影: X→画面横、Z→画面横オフセット、Y→画面縦）
-        for ray in self.engine.rays:
-            if len(ray.path) > 1:
-                # 3D光線パスを上面図座標に変換
-                # X座標: view_width/2を中心に、Z座標でオフセット（-Zが右）
-                # Y座標: 3DのY座標をそのまま使用
-                points = []
-                for p in ray.path:
-                    px = int((self.view_width // 2) * zoom - p[2] * zoom)  # Z→横方向
-                    py = int(p[1] * zoom)  # Y→縦方向
-                    points.append((px, py))
-
-                # 線の色
-                alpha = int(ray.intensity * 200)
-                color = (*self.COLOR_RAY[:3], min(alpha, 255))
-
-                # パスに沿って描画
-                for i in range(len(points) - 1):
-                    pygame.draw.line(view_surface, color, points[i], points[i + 1], max(1, int(2 * zoom)))
+        p1 = self.engine.rays_p1
+        if len(p1) > 0:
+            p2 = self.engine.rays_p2
+            ownership = self.engine.rays_ownership
+
+            # 全線分の端点をまとめて上面図座標に変換
+            # X座標: view_width/2を中心に、Z座標でオフセット（-Zが右）
+            # Y座標: 3DのY座標をそのまま使用
+            start_points = np.column_stack([(center_x - p1[:, 2] * zoom).astype(int),
+                                            (p1[:, 1] * zoom).astype(int)])
+            end_points = np.column_stack([(center_x - p2[:, 2] * zoom).astype(int),
+                                          (p2[:, 1] * zoom).astype(int)])
+
+            # 光線ごとの線分範囲 [first, last] と線の色（強度→アルファ）
+            firsts = np.flatnonzero(np.r_[True, ownership[1:] != ownership[:-1]])
+            lasts = np.r_[firsts[1:], len(ownership)] - 1
+            alphas = np.minimum((self.engine.rays_seg_intensity[firsts] * 200).astype(int), 255)
+            line_width = max(1, int(2 * zoom))
+
+            for first, last, alpha in zip(firsts.tolist(), lasts.tolist(), alphas.tolist()):
+                points = start_points[first:last + 1].tolist()
+                points.append(end_points[last].tolist())
+                color = (*ray_rgb, alpha)
+
+                # パスに沿って1回の描画呼び出しで描く
+                draw_lines(view_surface, color, False, points, line_width)
 
         # ビューサーフェスを画面に描画（中央部分を切り取って表示）
-        if zoom > 1.0:
-            # ズームした画像の中央部分を切り取る（パンオフセットを適用）
-            crop_x = max(0, min(zoomed_width - self.view_width,
-                                (zoomed_width - self.view_width) // 2 - int(self.top_view_offset[0] * zoom)))
-            crop_y = max(0, min(zoomed_height - self.view_height,
-                                (zoomed_height - self.view_height) // 2 - int(self.top_view_offset[1] * zoom)))
-            crop_width = min(self.view_width, zoomed_width)
-            crop_height = min(self.view_height, zoomed_height)
-            crop_rect = pygame.Rect(crop_x, crop_y, crop_width, crop_height)
-            cropped_surface = view_surface.subsurface(crop_rect)
-            self.screen.blit(cropped_surface, (offset_x, offset_y))
-        elif zoom < 1.0:
-            # 縮小時は中央に配置
-            scaled_surface = pygame.transform.smoothscale(view_surface, (int(self.view_width * zoom), int(self.view_height * zoom)))
-            center_x = offset_x + (self.view_width - int(self.view_width * zoom)) // 2
-            center_y = offset_y + (self.view_height - int(self.view_height * zoom)) // 2
-            self.screen.blit(scaled_surface, (center_x, center_y))
-        else:
-            self.screen.blit(view_surface, (offset_x, offset_y))
+        self._blit_view_surface(view_surface, zoom, self.top_view_offset, offset_x, offset_y)
+        self._store_view_region('top', cache_key, offset_x, offset_y)
 
-        # 枠線
-        pygame.draw.rect(self.screen, (100, 100, 100), (offset_x, offset_y, self.view_width, self.view_height), 2)
-
-        # タイトル
-        title = self.title_font.render("上面図（真上から）", True, self.COLOR_TEXT)
-        self.screen.blit(title, (offset_x, 20))
+        # 枠線とタイトル
+        self._draw_view_frame(offset_x, offset_y, "上面図（真上から）")
 
     def draw_sidebar(self, surface: pygame.Surface = None, offset_x: int = 0, offset_y: int = 0):
         """サイドバーUIを描画（2Dモード用・3Dオーバーレイ用共通）"""
@@ -1958,7 +2369,7 @@ class OpticsSimulator:
         y = offset_y + 20
 
         # タイトル
-        title = self.title_font.render("パラメータ", True, self.COLOR_TEXT)
+        title = self._render_text("パラメータ", self.title_font)
         surface.blit(title, (offset_x + 15, y))
 
         # タブグループを描画
@@ -1971,36 +2382,39 @@ class OpticsSimulator:
         slider_count = 0
         slider_start_y = 105  # タブの下からの開始位置
         slider_spacing = 60   # スライダー間の間隔
-        for slider in self.sliders:
-            if slider.tab_index == active_tab:
-                # スライダーの位置を動的に調整
-                slider.rect.x = offset_x + 20
-                slider.rect.y = offset_y + slider_start_y + slider_count * slider_spacing
-                slider.draw(surface, self.small_font)
-                slider_count += 1
+        for slider in self._sliders_by_tab[active_tab]:
+            # スライダーの位置を動的に調整
+            slider.rect.x = offset_x + 20
+            slider.rect.y = offset_y + slider_start_y + slider_count * slider_spacing
+            slider.draw(surface, self.small_font)
+            slider_count += 1
 
         # スライダーの下に情報と操作説明を配置
         y = offset_y + slider_start_y + slider_count * slider_spacing + 25
 
         # 情報表示
-        info_title = self.font.render("情報", True, self.COLOR_TEXT)
+        info_title = self._render_text("情報")
         surface.blit(info_title, (offset_x + 15, y))
         y += 22
 
         # 光源位置
-        pos_text = self.small_font.render(f"光源: X={int(self.light_position[0])}, Y={int(self.light_position[1])}", True, (100, 100, 100))
+        pos_text = self._render_text(f"光源: X={int(self.light_position[0])}, Y={int(self.light_position[1])}",
+                                     self.small_font, (100, 100, 100))
         surface.blit(pos_text, (offset_x + 20, y))
         y += 18
 
         # 光線数
-        text = self.small_font.render(f"光線数: {len(self.engine.rays)} 本", True, (100, 100, 100))
+        text = self._render_text(f"光線数: {len(self.engine.rays)} 本", self.small_font, (100, 100, 100))
         surface.blit(text, (offset_x + 20, y))
         y += 25
 
-        # 操作説明
-        help_title = self.font.render("操作方法", True, self.COLOR_TEXT)
-        surface.blit(help_title, (offset_x + 15, y))
-        y += 22
+        # 操作説明（固定の文言なので、まとめて描画した画像を転写するだけ）
+        surface.blit(self._get_help_surface(), (offset_x + 15, y))
+
+    def _get_help_surface(self) -> pygame.Surface:
+        """サイドバーの操作説明（見出し＋各行）を描画したサーフェスを取得（初回のみ作成）"""
+        if self._help_surface is not None:
+            return self._help_surface
 
         help_texts = [
             "左クリック: 光源移動(2D)",
@@ -2016,27 +2430,52 @@ class OpticsSimulator:
             "R: リセット",
         ]
 
+        # パネルの背景色で塗った不透明なサーフェスに描く（パネル右端の境界線には掛からない幅）
+        surface = pygame.Surface((self.ui_panel_width - 17, 22 + len(help_texts) * 16))
+        surface.fill((240, 240, 245))
+        surface.blit(self.font.render("操作方法", True, self.COLOR_TEXT), (0, 0))
+        y = 22
         for text in help_texts:
-            help_surf = self.small_font.render(text, True, (100, 100, 100))
-            surface.blit(help_surf, (offset_x + 20, y))
+            surface.blit(self.small_font.render(text, True, (100, 100, 100)), (5, y))
             y += 16
 
+        self._help_surface = surface
+        return surface
+
+    def _render_text(self, text: str, font: pygame.font.Font = None,
+                     color: Tuple[int, int, int] = None) -> pygame.Surface:
+        """テキストを描画したサーフェスを取得（フォントと色の省略時は標準のものを使う、render_text 参照）"""
+        if font is None:
+            font = self.font
+        if color is None:
+            color = self.COLOR_TEXT
+        return render_text(font, text, color)
+
     def draw_ui(self):
         """UI要素を描画（2Dモード用）"""
         self.draw_sidebar()
 
     def handle_events(self):
         """イベント処理"""
+        # ループ内で繰り返し参照する値をローカル変数に束縛
+        view_width = self.view_width
+        view_height = self.view_height
+        view_at = self._view_at
+        get_mouse_pos = pygame.mouse.get_pos
+        degrees = math.degrees
+
         for event in pygame.event.get():
+            # 何らかのイベントがあれば画面を描き直す
+            self._needs_redraw = True
+
             # タブのイベント処理を優先
             if self.tab_group.handle_event(event):
                 continue
 
             # スライダーのイベント処理（現在のタブに属するスライダーのみ）
             slider_handled = False
-            active_tab = self.tab_group.active_tab
-            for slider in self.sliders:
-                if slider.tab_index == active_tab and slider.handle_event(event):
+            for slider in self._sliders_by_tab[self.tab_group.active_tab]:
+                if slider.handle_event(event):
                     slider_handled = True
                     break
 
@@ -2053,51 +2492,51 @@ class OpticsSimulator:
                     # リセット
                     self.engine.balls.clear()
                     self.light_angle = 0.0
-                    self.light_spread = np.pi / 2
+                    self.light_spread = math.pi / 2
                     self.setup_default_scene()
-                    self.update_simulation()
+                    self.request_simulation_update()
                 elif event.key == pygame.K_UP:
                     # 水面を上げる
                     self.engine.water_level = max(50, self.engine.water_level - 1)
                     self.slider_map['water_level'].value = int(self.engine.water_level)
-                    self.update_simulation()
+                    self.request_simulation_update()
                 elif event.key == pygame.K_DOWN:
                     # 水面を下げる
-                    self.engine.water_level = min(self.view_height - 50, self.engine.water_level + 1)
+                    self.engine.water_level = min(view_height - 50, self.engine.water_level + 1)
                     self.slider_map['water_level'].value = int(self.engine.water_level)
-                    self.update_simulation()
+                    self.request_simulation_update()
                 elif event.key == pygame.K_LEFT:
                     # 光の角度を左に（0.1度ずつ）
-                    self.light_angle -= np.pi / 1800  # 0.1度ずつ
-                    self.slider_map['light_angle'].value = round(np.degrees(self.light_angle), 1)
-                    self.update_simulation()
+                    self.light_angle -= math.pi / 1800  # 0.1度ずつ
+                    self.slider_map['light_angle'].value = round(degrees(self.light_angle), 1)
+                    self.request_simulation_update()
                 elif event.key == pygame.K_RIGHT:
                     # 光の角度を右に（0.1度ずつ）
-                    self.light_angle += np.pi / 1800  # 0.1度ずつ
-                    self.slider_map['light_angle'].value = round(np.degrees(self.light_angle), 1)
-                    self.update_simulation()
+                    self.light_angle += math.pi / 1800  # 0.1度ずつ
+                    self.slider_map['light_angle'].value = round(degrees(self.light_angle), 1)
+                    self.request_simulation_update()
                 elif event.key == pygame.K_q:
                     # 光の広がりを狭く
-                    self.light_spread = max(0, self.light_spread - np.pi / 180)  # 1度ずつ
-                    self.slider_map['light_spread'].value = int(np.degrees(self.light_spread))
-                    self.update_simulation()
+                    self.light_spread = max(0, self.light_spread - math.pi / 180)  # 1度ずつ
+                    self.slider_map['light_spread'].value = int(degrees(self.light_spread))
+                    self.request_simulation_update()
                 elif event.key == pygame.K_e:
                     # 光の広がりを広く
-                    self.light_spread = min(np.pi, self.light_spread + np.pi / 180)  # 1度ずつ
-                    self.slider_map['light_spread'].value = int(np.degrees(self.light_spread))
-                    self.update_simulation()
+                    self.light_spread = min(math.pi, self.light_spread + math.pi / 180)  # 1度ずつ
+                    self.slider_map['light_spread'].value = int(degrees(self.light_spread))
+                    self.request_simulation_update()
                 elif event.key == pygame.K_n:
                     # 屈折率を下げる（0.01刻み）
                     new_index = max(1.00, self.engine.water_refractive_index - 0.01)
                     self.engine.water_refractive_index = round(new_index, 2)
                     self.slider_map['refractive_index'].value = self.engine.water_refractive_index
-                    self.update_simulation()
+                    self.request_simulation_update()
                 elif event.key == pygame.K_m:
                     # 屈折率を上げる（0.01刻み）
                     new_index = min(2.00, self.engine.water_refractive_index + 0.01)
                     self.engine.water_refractive_index = round(new_index, 2)
                     self.slider_map['refractive_index'].value = self.engine.water_refractive_index
-                    self.update_simulation()
+                    self.request_simulation_update()
                 elif event.key == pygame.K_p:
                     # プロファイルモード切替
                     self.profile_mode = not self.profile_mode
@@ -2124,6 +2563,7 @@ class OpticsSimulator:
                         # OpenGL有効のウィンドウに切り替え
                         pygame.display.set_mode((self.width, self.height), DOUBLEBUF | OPENGL)
                         self.init_opengl()
+                        self._warm_up_kernels_once()
                 elif event.key == pygame.K_4:
                     # 自然光3Dモード（光線なし）に切り替え
                     if not self.view_mode_natural_3d:
@@ -2133,6 +2573,7 @@ class OpticsSimulator:
                         # OpenGL有効のウィンドウに切り替え
                         pygame.display.set_mode((self.width, self.height), DOUBLEBUF | OPENGL)
                         self.init_opengl_natural()
+                        self._warm_up_kernels_once()
 
                 elif event.key == pygame.K_h:
                     # ヒートマップモードの切り替え（3Dモード時のみ有効）
@@ -2148,7 +2589,7 @@ class OpticsSimulator:
                 if event.button == 1:  # 左クリック
                     # 3Dモード時のUI操作
                     if self.view_mode_3d or self.view_mode_natural_3d:
-                        mouse_pos = pygame.mouse.get_pos()
+                        mouse_pos = get_mouse_pos()
 
                         # 視点切り替えボタンの判定（描画関数と同じパラメータ）
                         btn_width = 56
@@ -2234,62 +2675,33 @@ class OpticsSimulator:
 
                     # 2Dモード時のみ光源ドラッグ
                     if not self.view_mode_3d and not self.view_mode_natural_3d:
-                        mouse_pos = pygame.mouse.get_pos()
-                        side_view_x = self.ui_panel_width + self.view_margin
-                        side_view_y = 60
+                        mouse_pos = get_mouse_pos()
                         # 横図ビュー内かチェック
-                        if (side_view_x <= mouse_pos[0] <= side_view_x + self.view_width and
-                            side_view_y <= mouse_pos[1] <= side_view_y + self.view_height):
+                        if view_at(mouse_pos) == 'side':
                             # ズーム・オフセットを考慮した光源の表示位置を計算
-                            zoom = self.side_view_zoom
-                            if zoom > 1.0:
-                                # ズーム時の切り取り位置を計算
-                                crop_x = max(0, min(int(self.view_width * zoom) - self.view_width,
-                                                    (int(self.view_width * zoom) - self.view_width) // 2 - int(self.side_view_offset[0] * zoom)))
-                                crop_y = max(0, min(int(self.view_height * zoom) - self.view_height,
-                                                    (int(self.view_height * zoom) - self.view_height) // 2 - int(self.side_view_offset[1] * zoom)))
-                                # 画面上の光源位置
-                                display_light_x = int(self.light_position[0] * zoom) - crop_x + side_view_x
-                                display_light_y = int(self.light_position[1] * zoom) - crop_y + side_view_y
-                            elif zoom < 1.0:
-                                # 縮小時は中央配置
-                                center_x = side_view_x + (self.view_width - int(self.view_width * zoom)) // 2
-                                center_y = side_view_y + (self.view_height - int(self.view_height * zoom)) // 2
-                                display_light_x = int(self.light_position[0] * zoom) + center_x
-                                display_light_y = int(self.light_position[1] * zoom) + center_y
-                            else:
-                                # 等倍時
-                                display_light_x = int(self.light_position[0]) + side_view_x
-                                display_light_y = int(self.light_position[1]) + side_view_y
+                            display_light_x, display_light_y = self._side_world_to_screen(self.light_position)
 
                             # 光源をドラッグ開始（当たり判定）
-                            if np.linalg.norm(np.array(mouse_pos) - np.array([display_light_x, display_light_y])) < int(10 * zoom):
+                            if math.hypot(mouse_pos[0] - display_light_x, mouse_pos[1] - display_light_y) < int(10 * self.side_view_zoom):
                                 self.dragging_light = True
                 elif event.button == 2:  # マウスホイールクリック（中クリック）
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = get_mouse_pos()
                     self.drag_start_pos = mouse_pos
                     if self.view_mode_3d or self.view_mode_natural_3d:
                         # 3Dモード時はカメラ平行移動
                         self.dragging_camera_pan = True
                         self.camera_pan_start = mouse_pos
                     else:
-                        # 2Dモード時は平行移動
-                        side_view_x = self.ui_panel_width + self.view_margin
-                        side_view_y = 60
-                        top_view_x = self.ui_panel_width + self.view_width + self.view_margin * 2
-                        top_view_y = 60
-                        # 横図ビュー内かチェック
-                        if (side_view_x <= mouse_pos[0] <= side_view_x + self.view_width and
-                            side_view_y <= mouse_pos[1] <= side_view_y + self.view_height):
+                        # 2Dモード時は平行移動（マウス位置のビュー）
+                        view = view_at(mouse_pos)
+                        if view == 'side':
                             self.dragging_side_view = True
-                        # 上面図ビュー内
-                        elif (top_view_x <= mouse_pos[0] <= top_view_x + self.view_width and
-                              top_view_y <= mouse_pos[1] <= top_view_y + self.view_height):
+                        elif view == 'top':
                             self.dragging_top_view = True
                 elif event.button == 3:  # 右クリック
                     if self.view_mode_3d or self.view_mode_natural_3d:
                         # 3Dモード時はカメラ回転
-                        mouse_pos = pygame.mouse.get_pos()
+                        mouse_pos = get_mouse_pos()
                         self.dragging_camera = True
                         self.camera_drag_start = mouse_pos
                 elif event.button == 4:  # マウスホイール上（ズームイン）
@@ -2298,18 +2710,11 @@ class OpticsSimulator:
                         self.camera_distance = max(200.0, self.camera_distance - 30.0)
                     else:
                         # 2Dモード時
-                        mouse_pos = pygame.mouse.get_pos()
-                        side_view_x = self.ui_panel_width + self.view_margin
-                        side_view_y = 60
-                        top_view_x = self.ui_panel_width + self.view_width + self.view_margin * 2
-                        top_view_y = 60
-                        # 横図ビュー内
-                        if (side_view_x <= mouse_pos[0] <= side_view_x + self.view_width and
-                            side_view_y <= mouse_pos[1] <= side_view_y + self.view_height):
+                        # マウス位置のビューをズームイン
+                        view = view_at(get_mouse_pos())
+                        if view == 'side':
                             self.side_view_zoom = min(3.0, self.side_view_zoom * 1.1)
-                        # 上面図ビュー内
-                        elif (top_view_x <= mouse_pos[0] <= top_view_x + self.view_width and
-                              top_view_y <= mouse_pos[1] <= top_view_y + self.view_height):
+                        elif view == 'top':
                             self.top_view_zoom = min(3.0, self.top_view_zoom * 1.1)
                 elif event.button == 5:  # マウスホイール下（ズームアウト）
                     if self.view_mode_3d or self.view_mode_natural_3d:
@@ -2317,18 +2722,11 @@ class OpticsSimulator:
                         self.camera_distance = min(2000.0, self.camera_distance + 30.0)
                     else:
                         # 2Dモード時
-                        mouse_pos = pygame.mouse.get_pos()
-                        side_view_x = self.ui_panel_width + self.view_margin
-                        side_view_y = 60
-                        top_view_x = self.ui_panel_width + self.view_width + self.view_margin * 2
-                        top_view_y = 60
-                        # 横図ビュー内
-                        if (side_view_x <= mouse_pos[0] <= side_view_x + self.view_width and
-                            side_view_y <= mouse_pos[1] <= side_view_y + self.view_height):
+                        # マウス位置のビューをズームアウト
+                        view = view_at(get_mouse_pos())
+                        if view == 'side':
                             self.side_view_zoom = max(0.5, self.side_view_zoom / 1.1)
-                        # 上面図ビュー内
-                        elif (top_view_x <= mouse_pos[0] <= top_view_x + self.view_width and
-                              top_view_y <= mouse_pos[1] <= top_view_y + self.view_height):
+                        elif view == 'top':
                             self.top_view_zoom = max(0.5, self.top_view_zoom / 1.1)
 
             elif event.type == pygame.MOUSEBUTTONUP:
@@ -2348,7 +2746,7 @@ class OpticsSimulator:
             elif event.type == pygame.MOUSEMOTION:
                 if self.dragging_camera and self.camera_drag_start:
                     # 3Dモード時のカメラ回転
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = get_mouse_pos()
                     dx = mouse_pos[0] - self.camera_drag_start[0]
                     dy = mouse_pos[1] - self.camera_drag_start[1]
 
@@ -2362,7 +2760,7 @@ class OpticsSimulator:
                     self.camera_drag_start = mouse_pos
                 elif self.dragging_camera_pan and self.camera_pan_start:
                     # 3Dモード時のカメラ平行移動
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = get_mouse_pos()
                     dx = mouse_pos[0] - self.camera_pan_start[0]
                     dy = mouse_pos[1] - self.camera_pan_start[1]
 
@@ -2387,7 +2785,7 @@ class OpticsSimulator:
                     self.camera_pan_start = mouse_pos
                 elif self.dragging_profile_line:
                     # プロファイルラインのドラッグ中
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = get_mouse_pos()
                     if self.profile_scan_axis == 'Y':
                         # 縦ライン (X座標を更新)
                         self.profile_pos = max(0, min(self.width - 1, mouse_pos[0]))
@@ -2395,40 +2793,19 @@ class OpticsSimulator:
                         # 横ライン (Y座標を更新)
                         self.profile_pos = max(0, min(self.height - 1, mouse_pos[1]))
                 elif self.dragging_light:
-                    mouse_pos = pygame.mouse.get_pos()
-                    side_view_x = self.ui_panel_width + self.view_margin
-                    side_view_y = 60
+                    mouse_pos = get_mouse_pos()
 
                     # ズーム・オフセットを考慮してワールド座標に変換
-                    zoom = self.side_view_zoom
-                    if zoom > 1.0:
-                        # ズーム時の切り取り位置を計算
-                        crop_x = max(0, min(int(self.view_width * zoom) - self.view_width,
-                                            (int(self.view_width * zoom) - self.view_width) // 2 - int(self.side_view_offset[0] * zoom)))
-                        crop_y = max(0, min(int(self.view_height * zoom) - self.view_height,
-                                            (int(self.view_height * zoom) - self.view_height) // 2 - int(self.side_view_offset[1] * zoom)))
-                        # マウス位置をワールド座標に変換
-                        world_x = (mouse_pos[0] - side_view_x + crop_x) / zoom
-                        world_y = (mouse_pos[1] - side_view_y + crop_y) / zoom
-                    elif zoom < 1.0:
-                        # 縮小時
-                        center_x = (self.view_width - int(self.view_width * zoom)) // 2
-                        center_y = (self.view_height - int(self.view_height * zoom)) // 2
-                        world_x = (mouse_pos[0] - side_view_x - center_x) / zoom
-                        world_y = (mouse_pos[1] - side_view_y - center_y) / zoom
-                    else:
-                        # 等倍時
-                        world_x = mouse_pos[0] - side_view_x
-                        world_y = mouse_pos[1] - side_view_y
+                    world_x, world_y = self._side_screen_to_world(mouse_pos)
 
                     # ワールド座標の範囲制限
-                    world_x = max(0, min(self.view_width, world_x))
-                    world_y = max(0, min(self.view_height, world_y))
+                    world_x = max(0, min(view_width, world_x))
+                    world_y = max(0, min(view_height, world_y))
 
                     self.light_position = (world_x, world_y)
-                    self.update_simulation()
+                    self.request_simulation_update()
                 elif self.dragging_side_view and self.drag_start_pos:
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = get_mouse_pos()
                     # マウスの移動量を計算
                     dx = mouse_pos[0] - self.drag_start_pos[0]
                     dy = mouse_pos[1] - self.drag_start_pos[1]
@@ -2437,7 +2814,7 @@ class OpticsSimulator:
                     self.side_view_offset[1] += dy
                     self.drag_start_pos = mouse_pos
                 elif self.dragging_top_view and self.drag_start_pos:
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = get_mouse_pos()
                     # マウスの移動量を計算
                     dx = mouse_pos[0] - self.drag_start_pos[0]
                     dy = mouse_pos[1] - self.drag_start_pos[1]
@@ -2446,8 +2823,28 @@ class OpticsSimulator:
                     self.top_view_offset[1] += dy
                     self.drag_start_pos = mouse_pos
 
+    def _update_light_direction_cache(self):
+        """光の方向と広がり範囲の sin/cos を計算して保持（横図の矢印・扇形の描画用）"""
+        spread_left = self.light_angle - self.light_spread / 2
+        spread_right = self.light_angle + self.light_spread / 2
+        self._light_sin = math.sin(self.light_angle)
+        self._light_cos = math.cos(self.light_angle)
+        self._spread_sin_l = math.sin(spread_left)
+        self._spread_cos_l = math.cos(spread_left)
+        self._spread_sin_r = math.sin(spread_right)
+        self._spread_cos_r = math.cos(spread_right)
+
+    def request_simulation_update(self):
+        """シミュレーションの再計算を予約（次のフレーム描画前にまとめて実行）"""
+        self._simulation_dirty = True
+
     def update_simulation(self):
         """シミュレーションを更新"""
+        self._simulation_dirty = False
+        self._needs_redraw = True
+        self._simulation_generation += 1
+        self._update_light_direction_cache()
+
         # 複数光源からの光線をすべてクリア
         self.engine.rays.clear()
 
@@ -2476,6 +2873,18 @@ class OpticsSimulator:
                 center_angle=self.light_angle
             )
 
+        # 全光線の線分を一括計算用の配列にまとめる
+        self.engine.build_ray_segments()
+
+        # 球の光強度・ヒートマップはヒートマップ表示時にだけ計算する
+        self._heatmap_dirty = True
+
+    def update_heatmaps_if_needed(self):
+        """光線の再計算後、ヒートマップを表示する時に一度だけ球の光強度とヒートマップキャッシュを更新"""
+        if not self._heatmap_dirty:
+            return
+        self._heatmap_dirty = False
+
         # 球の光強度を計算
         self.calculate_ball_intensity()
 
@@ -2651,7 +3060,7 @@ class OpticsSimulator:
             # グリッド線
             pygame.draw.line(s, (80, 80, 80), (plot_x_start, py), (plot_x_start + graph_width, py), 1)
             # ラベル (文字色を白く、位置調整)
-            label = self.small_font.render(str(val), True, (255, 255, 255))
+            label = self._render_text(str(val), self.small_font, (255, 255, 255))
             label_rect = label.get_rect(midright=(plot_x_start - 10, py))
             s.blit(label, label_rect)
             
@@ -2665,7 +3074,7 @@ class OpticsSimulator:
             pygame.draw.line(s, (80, 80, 80), (px, plot_y_end), (px, plot_y_end - plot_h), 1)
             # ラベル (間引いて表示)
             if i % 2 == 0:
-                label = self.small_font.render(str(val), True, (200, 200, 200))
+                label = self._render_text(str(val), self.small_font, (200, 200, 200))
                 label_rect = label.get_rect(midtop=(px, plot_y_end + 5))
                 s.blit(label, label_rect)
 
@@ -2708,7 +3117,10 @@ class OpticsSimulator:
 
         # RGBAデータを取得
         data = pygame.image.tostring(surface, 'RGBA', True)
+        self._draw_pixels_to_opengl(data, width, height, x, y)
 
+    def _draw_pixels_to_opengl(self, data: bytes, width: int, height: int, x: int, y: int):
+        """上下反転済みのRGBAピクセルデータを画面の (x, y) を左上としてOpenGLで描画"""
         # OpenGLの状態を保存
         glDisable(GL_DEPTH_TEST)
         glDisable(GL_LIGHTING)
@@ -2751,9 +3163,16 @@ class OpticsSimulator:
         while self.running:
             self.handle_events()
 
+            # イベントで変更があった場合のみ、1フレームにつき1回だけ再計算
+            if self._simulation_dirty:
+                self.update_simulation()
+
             # 水面ゆらぎのアニメーション更新
             if self.engine.water_ripple_strength > 0:
                 self.engine.water_ripple_time += 0.05
+                # 水面のゆらぎは3Dモードでのみ毎フレーム表示が変わる
+                if self.view_mode_3d or self.view_mode_natural_3d:
+                    self._needs_redraw = True
 
             # 球の回転アニメーション更新（rpm to radians per frame at 60fps）
             if self.ball_rotation_rpm > 0:
@@ -2763,6 +3182,19 @@ class OpticsSimulator:
                 # 2πを超えたらリセット
                 if self.ball_rotation_angle > 2 * math.pi:
                     self.ball_rotation_angle -= 2 * math.pi
+                # 球の回転は3Dモードでのみ表示される
+                if self.view_mode_3d or self.view_mode_natural_3d:
+                    self._needs_redraw = True
+
+            # テキスト入力中はカーソルが描画のたびに点滅を進めるので毎フレーム描き直す
+            if any(slider.input_active for slider in self.sliders):
+                self._needs_redraw = True
+
+            # 変化がなければ描画を省き、CPUを明け渡す
+            if not self._needs_redraw:
+                self.clock.tick(60)
+                continue
+            self._needs_redraw = False
 
             # 描画
             if self.view_mode_3d:
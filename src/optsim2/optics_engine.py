@@ -21,13 +21,24 @@ class Ray:
         self.direction = np.array(direction, dtype=float)
         self.direction = self.direction / np.linalg.norm(self.direction)  # 正規化
         self.intensity = intensity
-        self.path = [self.origin.copy()]  # 光線の経路
+        # 光線の経路（通過点を確保済みの配列に順に書き込む、足りなくなったら拡張）
+        self._path_points = np.empty((8, len(self.origin)))
+        self._path_points[0] = self.origin
+        self._path_length = 1
+
+    @property
+    def path(self) -> np.ndarray:
+        """光線の経路 (通過点の数, 次元) の配列（内部バッファのビュー）"""
+        return self._path_points[:self._path_length]
 
     def propagate(self, distance: float):
         """光線を伝播させる"""
         new_point = self.origin + self.direction * distance
         self.origin = new_point
-        self.path.append(new_point.copy())
+        if self._path_length == len(self._path_points):
+            self._path_points = np.concatenate([self._path_points, np.empty_like(self._path_points)])
+        self._path_points[self._path_length] = new_point
+        self._path_length += 1
         return new_point
 
 
@@ -50,6 +61,11 @@ class OpticsEngine:
         self.water_refractive_index = self.N_WATER  # 水の屈折率（変更可能）
         self.rays = []
         self.balls = []
+        # 全光線の線分をまとめた配列（Struct of Arrays、build_ray_segments()で更新）
+        self.rays_p1 = np.empty((0, 3))
+        self.rays_p2 = np.empty((0, 3))
+        self.rays_seg_intensity = np.empty(0)
+        self.rays_ownership = np.empty(0, dtype=np.int32)
         # 水面ゆらぎ設定
         self.water_ripple_strength = 0.0  # ゆらぎの強度（0.0 = なし、1.0 = 強い）
         self.water_ripple_frequency = 0.05  # ゆらぎの周波数
@@ -375,3 +391,33 @@ class OpticsEngine:
         # 既存の光線に追加（複数光源対応）
         self.rays.extend(rays)
         return rays
+
+    def build_ray_segments(self):
+        """
+        全光線の経路を線分ごとの配列にまとめる（Struct of Arrays）
+
+        光線を追加・削除した後に呼び出すと、以下の属性が更新される
+            rays_p1: 線分の始点 (M, 3)（2D光線のZ座標は0）
+            rays_p2: 線分の終点 (M, 3)
+            rays_seg_intensity: 線分が属する光線の強度 (M,)
+            rays_ownership: 線分が属する光線の self.rays 内のインデックス (M,)
+        """
+        paths = []
+        for ray in self.rays:
+            path = ray.path
+            if path.shape[1] == 2:
+                path = np.column_stack([path, np.zeros(len(path))])
+            paths.append(path)
+
+        seg_counts = [len(path) - 1 for path in paths]
+        if sum(seg_counts) == 0:
+            self.rays_p1 = np.empty((0, 3))
+            self.rays_p2 = np.empty((0, 3))
+            self.rays_seg_intensity = np.empty(0)
+            self.rays_ownership = np.empty(0, dtype=np.int32)
+            return
+
+        self.rays_p1 = np.concatenate([path[:-1] for path in paths])
+        self.rays_p2 = np.concatenate([path[1:] for path in paths])
+        self.rays_seg_intensity = np.repeat([ray.intensity for ray in self.rays], seg_counts)
+        self.rays_ownership = np.repeat(np.arange(len(paths), dtype=np.int32), seg_counts)
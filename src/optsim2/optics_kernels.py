@@ -0,0 +1,329 @@
+"""
+光線計算カーネル
+光線の線分と球の交差判定など、全光線をまとめて処理する数値計算ループを実装
+Numbaがインストールされていれば JIT コンパイルし、なければ NumPy のベクトル演算で計算する
+"""
+import math
+import numpy as np
+from typing import Tuple
+
+try:
+    import numba
+except ImportError:  # Numbaは任意の依存（pip install optsim2[jit]）
+    numba = None
+
+HAS_NUMBA = numba is not None
+
+# この線分数以上のときだけ並列版のカーネルを使う（少ない場合はスレッド起動の方が高くつく）
+PARALLEL_MIN_SEGMENTS = 20000
+
+
+def _ball_dot_products(p1: np.ndarray, p2: np.ndarray, ball_pos: np.ndarray):
+    """
+    線分と球の交差判定に使う方向ベクトルと内積 (d·d, f·d, f·f) を計算
+
+    光線は球面上の点で反射するため、線分の終点がちょうど球面に乗り t1 が 1 の前後数ulpになる。
+    np.dot と同じ内積計算（np.vecdot）を使い、その境界の判定を線分ごとのループと丸めまで一致させる。
+    """
+    d = p2 - p1
+    f = p1 - ball_pos
+    return d, np.vecdot(d, d), np.vecdot(f, d), np.vecdot(f, f)
+
+
+def _accumulate_ball_intensity_numpy(p1: np.ndarray, d: np.ndarray, dd: np.ndarray, fd: np.ndarray,
+                                     ff: np.ndarray, intensities: np.ndarray, ball_pos: np.ndarray,
+                                     radius: float, out_bins: np.ndarray):
+    """accumulate_ball_intensity の NumPy 実装（Numbaがない場合に使用）"""
+    a = dd
+    b = 2 * fd
+    c = ff - radius ** 2
+
+    discriminant = b * b - 4 * a * c
+    valid = (a != 0) & (discriminant >= 0)
+
+    t1 = (-b[valid] - np.sqrt(discriminant[valid])) / (2 * a[valid])
+    hit = (t1 >= 0) & (t1 <= 1)
+
+    # 交点の位置
+    hit_point = p1[valid][hit] + t1[hit, None] * d[valid][hit]
+
+    # 球の中心からの角度を計算（度数、-180～180を0方向へ切り捨て）
+    diff = hit_point - ball_pos
+    angle_deg = np.degrees(np.arctan2(diff[:, 1], diff[:, 0])).astype(np.int32)
+
+    # その角度の強度を累積（180°は-180°と同じ方向として扱う）
+    out_bins += np.bincount((angle_deg + 180) % 360, weights=intensities[valid][hit],
+                            minlength=len(out_bins))
+
+
+def _count_surface_hits_numpy(points: np.ndarray, p1: np.ndarray, d: np.ndarray, line_len_sq: np.ndarray,
+                              ray_starts: np.ndarray, tolerance: float) -> np.ndarray:
+    """count_surface_hits の NumPy 実装（Numbaがない場合に使用）"""
+    # 全表面点 (M) と全線分 (N) の最短距離を (M, N) でまとめて計算
+    wx = points[:, 0, None] - p1[:, 0]
+    wy = points[:, 1, None] - p1[:, 1]
+    wz = points[:, 2, None] - p1[:, 2]
+    t = np.clip((wx * d[:, 0] + wy * d[:, 1] + wz * d[:, 2]) / line_len_sq, 0, 1)
+    ex = wx - t * d[:, 0]
+    ey = wy - t * d[:, 1]
+    ez = wz - t * d[:, 2]
+    hit = ex * ex + ey * ey + ez * ez <= tolerance * tolerance
+
+    # 点ごとに「いずれかの線分が当たった光線」の数を数える
+    return np.logical_or.reduceat(hit, ray_starts, axis=1).sum(axis=1)
+
+
+def _count_ball_ray_hits_numpy(p1: np.ndarray, dx: np.ndarray, dy: np.ndarray, line_len: np.ndarray,
+                               origin_z: np.ndarray, ownership: np.ndarray, ball_pos, radius: float,
+                               z_tolerance: float):
+    """count_ball_ray_hits の NumPy 実装（Numbaがない場合に使用）"""
+    cx, cy, cz = ball_pos[0], ball_pos[1], ball_pos[2]
+
+    # 起点Z座標が近い光線の、長さのある線分だけを判定
+    candidate = np.flatnonzero((np.abs(origin_z - cz) <= z_tolerance) & (line_len >= 0.001))
+    if len(candidate) == 0:
+        return 0, -1
+    p1x = p1[candidate, 0]
+    p1y = p1[candidate, 1]
+    cdx = dx[candidate]
+    cdy = dy[candidate]
+    clen = line_len[candidate]
+
+    # 球の中心から線分への最短距離（の2乗）
+    t = np.clip(((cx - p1x) * cdx + (cy - p1y) * cdy) / (clen * clen), 0, 1)
+    closest_x = p1x + t * cdx
+    closest_y = p1y + t * cdy
+    hit = np.flatnonzero((cx - closest_x) ** 2 + (cy - closest_y) ** 2 <= radius * radius)
+    if len(hit) == 0:
+        return 0, -1
+    return len(np.unique(ownership[candidate[hit]])), int(candidate[hit[0]])
+
+
+if HAS_NUMBA:
+    @numba.njit(cache=True)
+    def _accumulate_ball_intensity_jit(p1, d, dd, fd, ff, intensities, bx, by, radius, out_bins):
+        """accumulate_ball_intensity の JIT 実装（線分ごとのループを機械語で実行）"""
+        r2 = radius * radius
+        for i in range(p1.shape[0]):
+            a = dd[i]
+            if a == 0:
+                continue
+
+            b = 2 * fd[i]
+            c = ff[i] - r2
+            discriminant = b * b - 4 * a * c
+            if discriminant < 0:
+                continue
+
+            t1 = (-b - math.sqrt(discriminant)) / (2 * a)
+            if t1 < 0 or t1 > 1:
+                continue
+
+            # 交点の球の中心からの角度（度数、0方向へ切り捨て）
+            hit_x = p1[i, 0] + t1 * d[i, 0] - bx
+            hit_y = p1[i, 1] + t1 * d[i, 1] - by
+            angle_deg = int(math.degrees(math.atan2(hit_y, hit_x)))
+            out_bins[(angle_deg + 180) % 360] += intensities[i]
+
+    @numba.njit(cache=True, parallel=True)
+    def _ball_hit_bins_parallel(p1, d, dd, fd, ff, bx, by, radius):
+        """線分ごとの交点の角度ビンを並列に計算（当たらない線分は -1）"""
+        n = p1.shape[0]
+        bins = np.full(n, -1, dtype=np.int32)
+        r2 = radius * radius
+        for i in numba.prange(n):
+            a = dd[i]
+            if a == 0:
+                continue
+
+            b = 2 * fd[i]
+            c = ff[i] - r2
+            discriminant = b * b - 4 * a * c
+            if discriminant < 0:
+                continue
+
+            t1 = (-b - math.sqrt(discriminant)) / (2 * a)
+            if t1 < 0 or t1 > 1:
+                continue
+
+            hit_x = p1[i, 0] + t1 * d[i, 0] - bx
+            hit_y = p1[i, 1] + t1 * d[i, 1] - by
+            angle_deg = int(math.degrees(math.atan2(hit_y, hit_x)))
+            bins[i] = (angle_deg + 180) % 360
+        return bins
+
+    @numba.njit(cache=True)
+    def _accumulate_bins(bins, intensities, out_bins):
+        """角度ビンごとに強度を累積（書き込みが衝突しないよう逐次処理）"""
+        for i in range(bins.shape[0]):
+            if bins[i] >= 0:
+                out_bins[bins[i]] += intensities[i]
+
+    @numba.njit(cache=True, parallel=True)
+    def _count_surface_hits_jit(points, p1, d, line_len_sq, ray_starts, tolerance):
+        """count_surface_hits の JIT 実装（表面点ごとに並列、光線ごとに最初の当たりで打ち切り）"""
+        n_points = points.shape[0]
+        n_rays = ray_starts.shape[0]
+        n_segments = p1.shape[0]
+        counts = np.zeros(n_points, dtype=np.int64)
+        tolerance_sq = tolerance * tolerance
+        for m in numba.prange(n_points):
+            px = points[m, 0]
+            py = points[m, 1]
+            pz = points[m, 2]
+            count = 0
+            for r in range(n_rays):
+                end = ray_starts[r + 1] if r + 1 < n_rays else n_segments
+                for k in range(ray_starts[r], end):
+                    wx = px - p1[k, 0]
+                    wy = py - p1[k, 1]
+                    wz = pz - p1[k, 2]
+                    t = (wx * d[k, 0] + wy * d[k, 1] + wz * d[k, 2]) / line_len_sq[k]
+                    t = min(max(t, 0.0), 1.0)
+                    ex = wx - t * d[k, 0]
+                    ey = wy - t * d[k, 1]
+                    ez = wz - t * d[k, 2]
+                    if ex * ex + ey * ey + ez * ez <= tolerance_sq:
+                        count += 1
+                        break
+            counts[m] = count
+        return counts
+
+    @numba.njit(cache=True)
+    def _count_ball_ray_hits_jit(p1, dx, dy, line_len, origin_z, ownership, cx, cy, cz, radius, z_tolerance):
+        """count_ball_ray_hits の JIT 実装（当たった光線の残りの線分は飛ばす）"""
+        r2 = radius * radius
+        count = 0
+        first = -1
+        hit_ray = -1
+        for k in range(p1.shape[0]):
+            if ownership[k] == hit_ray:
+                continue
+            if abs(origin_z[k] - cz) > z_tolerance or line_len[k] < 0.001:
+                continue
+            # 線分の外接矩形を半径分広げた範囲に中心がなければ、距離を計算せずに外れ
+            x0 = p1[k, 0]
+            x1 = x0 + dx[k]
+            y0 = p1[k, 1]
+            y1 = y0 + dy[k]
+            if (cx < min(x0, x1) - radius or cx > max(x0, x1) + radius or
+                    cy < min(y0, y1) - radius or cy > max(y0, y1) + radius):
+                continue
+            length = line_len[k]
+            t = ((cx - p1[k, 0]) * dx[k] + (cy - p1[k, 1]) * dy[k]) / (length * length)
+            t = min(max(t, 0.0), 1.0)
+            ex = cx - (p1[k, 0] + t * dx[k])
+            ey = cy - (p1[k, 1] + t * dy[k])
+            if ex * ex + ey * ey <= r2:
+                count += 1
+                hit_ray = ownership[k]
+                if first < 0:
+                    first = k
+        return count, first
+
+
+def accumulate_ball_intensity(p1: np.ndarray, p2: np.ndarray, intensities: np.ndarray,
+                              ball_pos: np.ndarray, radius: float, out_bins: np.ndarray):
+    """
+    光線の線分と球の交点を求め、交点の角度ごとに光線の強度を累積
+
+    Args:
+        p1: 線分の始点 (M, 3)
+        p2: 線分の終点 (M, 3)
+        intensities: 線分が属する光線の強度 (M,)
+        ball_pos: 球の中心位置 (x, y, z)
+        radius: 球の半径
+        out_bins: 累積先の配列 (360,)、インデックス = 角度(-180～179°) + 180
+    """
+    if len(p1) == 0:
+        return
+
+    ball_pos = np.asarray(ball_pos, dtype=float)
+    d, dd, fd, ff = _ball_dot_products(p1, p2, ball_pos)
+
+    if HAS_NUMBA:
+        bx, by = float(ball_pos[0]), float(ball_pos[1])
+        if len(p1) >= PARALLEL_MIN_SEGMENTS:
+            # 交差判定は線分ごとに独立なので並列化し、累積だけを逐次で行う
+            bins = _ball_hit_bins_parallel(p1, d, dd, fd, ff, bx, by, float(radius))
+            _accumulate_bins(bins, intensities, out_bins)
+        else:
+            _accumulate_ball_intensity_jit(p1, d, dd, fd, ff, intensities, bx, by, float(radius), out_bins)
+    else:
+        _accumulate_ball_intensity_numpy(p1, d, dd, fd, ff, intensities, ball_pos, radius, out_bins)
+
+
+def count_surface_hits(points: np.ndarray, p1: np.ndarray, d: np.ndarray, line_len_sq: np.ndarray,
+                       ray_starts: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    球の表面の各点について、点から許容距離内を通る光線の数を数える
+
+    Args:
+        points: 表面の点 (M, 3)
+        p1: 線分の始点 (N, 3)（長さ0の線分は除いておく）
+        d: 線分の方向ベクトル p2 - p1 (N, 3)
+        line_len_sq: 線分の長さの2乗 (N,)
+        ray_starts: 光線ごとの先頭線分のインデックス (R,)（線分は光線ごとに連続して並ぶ）
+        tolerance: 当たりとみなす点と線分の最短距離
+
+    Returns:
+        点ごとの光線数 (M,)
+    """
+    if len(p1) == 0:
+        return np.zeros(len(points), dtype=np.int64)
+
+    if HAS_NUMBA:
+        return _count_surface_hits_jit(points, p1, d, line_len_sq, ray_starts.astype(np.int64), float(tolerance))
+    return _count_surface_hits_numpy(points, p1, d, line_len_sq, ray_starts, tolerance)
+
+
+def count_ball_ray_hits(p1: np.ndarray, dx: np.ndarray, dy: np.ndarray, line_len: np.ndarray,
+                        origin_z: np.ndarray, ownership: np.ndarray, ball_pos, radius: float,
+                        z_tolerance: float) -> Tuple[int, int]:
+    """
+    XY平面で球に当たる光線を数える（線分と球の中心の最短距離が半径以内なら当たり）
+
+    Args:
+        p1: 線分の始点 (M, 3)
+        dx, dy: 線分の方向ベクトルの X, Y 成分 (M,)
+        line_len: 線分のXY平面での長さ (M,)（0.001未満の線分は判定しない）
+        origin_z: 線分が属する光線の起点Z座標 (M,)
+        ownership: 線分が属する光線のインデックス (M,)（線分は光線ごと・経路順に連続して並ぶ）
+        ball_pos: 球の中心 (x, y, z)
+        radius: 球の半径
+        z_tolerance: 光線の起点Z座標と球のZ座標の許容差（これより離れた光線は判定しない）
+
+    Returns:
+        (当たった光線の数, 最初に当たった線分のインデックス（当たりがなければ -1）)
+    """
+    if len(p1) == 0:
+        return 0, -1
+
+    if HAS_NUMBA:
+        count, first = _count_ball_ray_hits_jit(p1, dx, dy, line_len, origin_z, ownership,
+                                                float(ball_pos[0]), float(ball_pos[1]), float(ball_pos[2]),
+                                                float(radius), float(z_tolerance))
+        return int(count), int(first)
+    return _count_ball_ray_hits_numpy(p1, dx, dy, line_len, origin_z, ownership, ball_pos, radius, z_tolerance)
+
+
+def warm_up():
+    """
+    JITカーネルを小さな入力で一度呼び出し、コンパイル（またはキャッシュの読み込み）を済ませる
+
+    起動時に呼んでおくと、ヒートマップを初めて表示した時に描画が止まらない。
+    Numbaがない場合は何もしない。
+    """
+    if not HAS_NUMBA:
+        return
+    p1 = np.zeros((1, 3))
+    p2 = np.ones((1, 3))
+    intensities = np.ones(1)
+    out_bins = np.zeros(360)
+    _accumulate_ball_intensity_jit(p1, p2, intensities, intensities, intensities, intensities, 0.0, 0.0, 1.0,
+                                   out_bins)
+    bins = _ball_hit_bins_parallel(p1, p2, intensities, intensities, intensities, 0.0, 0.0, 1.0)
+    _accumulate_bins(bins, intensities, out_bins)
+    _count_surface_hits_jit(p1, p1, p2, intensities, np.zeros(1, dtype=np.int64), 1.0)
+    _count_ball_ray_hits_jit(p1, intensities, intensities, intensities, intensities, np.zeros(1, dtype=np.int32),
+                             0.0, 0.0, 0.0, 1.0, 1.0)
@@ -0,0 +1,148 @@
+"""
+光線計算カーネルのテスト
+"""
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from optsim2 import optics_kernels  # noqa: E402
+from optsim2.main import OpticsSimulator  # noqa: E402
+
+
+def _ball_intensity_loop(rays, ball) -> dict:
+    """線分ごとのループによる球の光強度マップ（ベクトル化前の calculate_ball_intensity と同じ計算）"""
+    intensity_map = {}
+    ball_pos = np.array(ball['position'])
+    ball_radius = ball['radius']
+
+    for ray in rays:
+        if len(ray.path) < 2:
+            continue
+
+        for i in range(len(ray.path) - 1):
+            p1 = np.array(ray.path[i], dtype=float)
+            p2 = np.array(ray.path[i + 1], dtype=float)
+
+            d = p2 - p1
+            f = p1 - ball_pos
+
+            a = np.dot(d, d)
+            if a == 0:
+                continue
+
+            b = 2 * np.dot(f, d)
+            c = np.dot(f, f) - ball_radius ** 2
+
+            discriminant = b * b - 4 * a * c
+
+            if discriminant >= 0:
+                discriminant = np.sqrt(discriminant)
+                t1 = (-b - discriminant) / (2 * a)
+
+                if 0 <= t1 <= 1:
+                    hit_point = p1 + t1 * d
+                    diff = hit_point - ball_pos
+                    angle_deg = int(np.degrees(np.arctan2(diff[1], diff[0])))
+                    intensity_map[angle_deg] = intensity_map.get(angle_deg, 0) + ray.intensity
+
+    return intensity_map
+
+
+@pytest.fixture(scope='module')
+def default_scene():
+    """起動直後のシーン（光線を計算済み）"""
+    simulator = OpticsSimulator()
+    simulator.update_simulation()
+    return simulator
+
+
+@pytest.mark.parametrize('use_numba', [False, True])
+def test_accumulate_ball_intensity_matches_loop_on_default_scene(default_scene, monkeypatch, use_numba):
+    if use_numba and not optics_kernels.HAS_NUMBA:
+        pytest.skip('numba is not installed')
+    monkeypatch.setattr(optics_kernels, 'HAS_NUMBA', use_numba)
+
+    engine = default_scene.engine
+    ball = engine.balls[0]
+    out_bins = np.zeros(360)
+    optics_kernels.accumulate_ball_intensity(engine.rays_p1, engine.rays_p2, engine.rays_seg_intensity,
+                                             np.array(ball['position'], dtype=float), ball['radius'], out_bins)
+
+    expected = _ball_intensity_loop(engine.rays, ball)
+    assert expected
+    actual = {index - 180: value for index, value in enumerate(out_bins) if value != 0}
+    assert actual.keys() == expected.keys()
+    for angle, value in expected.items():
+        assert actual[angle] == pytest.approx(value)
+
+
+def _random_segments(n_rays: int, n_points: int, seed: int = 0):
+    """球（中心 (0, 0, 0)、半径 1）の周りを通るランダムな光線の経路を線分配列にまとめる"""
+    rng = np.random.default_rng(seed)
+    paths = rng.uniform(-2, 2, size=(n_rays, n_points, 3))
+    paths[:, :, 2] *= 0.1
+    p1 = paths[:, :-1].reshape(-1, 3)
+    p2 = paths[:, 1:].reshape(-1, 3)
+    ownership = np.repeat(np.arange(n_rays, dtype=np.int32), n_points - 1)
+    intensities = rng.uniform(0.5, 1.5, size=n_rays)[ownership]
+    return p1, p2, ownership, intensities
+
+
+def _both_paths(monkeypatch, func, *args):
+    """NumPy 実装と JIT 実装の両方で同じ引数の結果を返す"""
+    monkeypatch.setattr(optics_kernels, 'HAS_NUMBA', False)
+    expected = func(*args)
+    monkeypatch.setattr(optics_kernels, 'HAS_NUMBA', True)
+    actual = func(*args)
+    return expected, actual
+
+
+@pytest.mark.skipif(not optics_kernels.HAS_NUMBA, reason='numba is not installed')
+@pytest.mark.parametrize('n_rays', [50, optics_kernels.PARALLEL_MIN_SEGMENTS // 4 + 1])
+def test_accumulate_ball_intensity_jit_matches_numpy(monkeypatch, n_rays):
+    p1, p2, _, intensities = _random_segments(n_rays, 5)
+
+    def accumulate(*args):
+        out_bins = np.zeros(360)
+        optics_kernels.accumulate_ball_intensity(*args, out_bins)
+        return out_bins
+
+    expected, actual = _both_paths(monkeypatch, accumulate, p1, p2, intensities, np.zeros(3), 1.0)
+    assert np.count_nonzero(expected) > 0
+    np.testing.assert_allclose(actual, expected)
+
+
+@pytest.mark.skipif(not optics_kernels.HAS_NUMBA, reason='numba is not installed')
+def test_count_surface_hits_jit_matches_numpy(monkeypatch):
+    p1, p2, ownership, _ = _random_segments(40, 6)
+    d = p2 - p1
+    line_len_sq = np.sum(d * d, axis=1)
+    ray_starts = np.flatnonzero(np.r_[True, ownership[1:] != ownership[:-1]])
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(200, 3))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+
+    expected, actual = _both_paths(monkeypatch, optics_kernels.count_surface_hits,
+                                   points, p1, d, line_len_sq, ray_starts, 0.3)
+    assert expected.sum() > 0
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.skipif(not optics_kernels.HAS_NUMBA, reason='numba is not installed')
+@pytest.mark.parametrize('ball_pos, z_tolerance', [((0.0, 0.0, 0.0), 1000.0),
+                                                   ((0.0, 0.0, 0.0), 0.05),
+                                                   ((5.0, 5.0, 0.0), 1000.0)])
+def test_count_ball_ray_hits_jit_matches_numpy(monkeypatch, ball_pos, z_tolerance):
+    p1, p2, ownership, _ = _random_segments(60, 5)
+    d = p2 - p1
+    line_len = np.hypot(d[:, 0], d[:, 1])
+    origin_z = p1[np.r_[0, np.flatnonzero(ownership[1:] != ownership[:-1]) + 1], 2][ownership]
+
+    expected, actual = _both_paths(monkeypatch, optics_kernels.count_ball_ray_hits,
+                                   p1, d[:, 0].copy(), d[:, 1].copy(), line_len, origin_z, ownership,
+                                   ball_pos, 0.5, z_tolerance)
+    assert actual == expected